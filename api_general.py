@@ -3,6 +3,7 @@ from starlette.requests import Request
 from starlette.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, Response
+from pydantic import BaseModel
 from typing import Optional, Dict, Any, List, Union
 import json
 import html
@@ -29,6 +30,12 @@ from models import (
 
 import base64
 import webrtcvad
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
 from tools.phone.twilio_phone import audio_converter
 
 from voice_processor import VoiceProcessor
@@ -72,6 +79,13 @@ def make_twiml_response(
     return HTMLResponse(content=body, status_code=status_code, media_type="application/xml")
 
 
+def make_model_response(model: BaseModel, status_code: int = 200) -> Response:
+    """Serialize a response model straight to JSON bytes with its prebuilt pydantic-core
+    serializer, skipping FastAPI's re-validation and jsonable_encoder pass (matters for
+    responses carrying base64 audio)."""
+    return Response(content=model.model_dump_json(), status_code=status_code, media_type="application/json")
+
+
 def _cache_mongodb_health(payload: Dict[str, Any]) -> Dict[str, Any]:
     app.state.mongodb_health_cache = {
         "payload": payload,
@@ -237,13 +251,43 @@ active_stream_handlers: Dict[str, "TwilioStreamHandler"] = {}
 @app.on_event("startup")
 async def startup_event():
     from config import TWILIO_PROCESSING_MODE, TWILIO_WEBHOOK_BASE_URL, RUNTIME_ENVIRONMENT
-    from databases.mongodb_db import initialize_mongodb, test_connection
+    from databases.mongodb_db import initialize_mongodb, test_connection, is_mongodb_available
     from utils.environment_detector import get_environment_info
     
     # Initialize MongoDB for conversation storage
     initialize_mongodb()
     await test_connection()
     
+    # Ensure indexes used by hot query paths
+    from databases.mongodb_message_store import MongoDBMessageStore
+    from databases.mongodb_phone_store import MongoDBPhoneStore
+    from databases.mongodb_prompt_store import MongoDBPromptStore
+    from databases.mongodb_scheduled_call_store import MongoDBScheduledCallStore
+    from databases.mongodb_user_store import MongoDBUserStore
+    message_store = MongoDBMessageStore()
+    await message_store.ensure_indexes()
+    # Messages are read from 'conversation_messages' only; copy any history still in the
+    # legacy 'messages' collection first, or conversations would lose context and split
+    if not await message_store.migrate_legacy_messages():
+        raise RuntimeError(
+            "Legacy 'messages' collection could not be migrated to 'conversation_messages'. "
+            "Fix the error above or run scripts/migrate_messages_collection.py before starting the API."
+        )
+    phone_store = MongoDBPhoneStore()
+    # Webhook lookups match the normalized number exactly, so rewrite registrations stored
+    # in a legacy format first (this also lets the unique index build over them)
+    if not await phone_store.normalize_stored_numbers():
+        logger.error("❌ Could not normalize stored phone numbers - registrations in a legacy format "
+                     "won't match inbound webhooks. Run scripts/migrate_phone_numbers.py.")
+    if not await phone_store.ensure_indexes() and is_mongodb_available():
+        logger.error("❌ Unique phone registration index is missing - register_phone falls back to a "
+                     "pre-insert duplicate check. Remove duplicate live registrations and restart.")
+    await MongoDBPromptStore().ensure_indexes()
+    await MongoDBScheduledCallStore().ensure_indexes()
+    if not await MongoDBUserStore().ensure_indexes() and is_mongodb_available():
+        logger.error("❌ Unique user email index is missing - create_user falls back to a "
+                     "pre-insert duplicate check. Remove duplicate user emails and restart.")
+    
     # Get environment info for logging
     env_info = get_environment_info()
     
@@ -313,19 +357,15 @@ async def root(request: Request):
     description="Check the health status of the API",
     tags=["General"]
 )
-async def health_check(request: Request):
+async def health_check():
     """Health check endpoint"""
-    if _is_fast_probe(request):
-        return HealthResponse(
-            status="healthy",
-            timestamp=datetime.utcnow().isoformat(),
-            version="1.0.0"
-        )
-    return HealthResponse(
+    # Server-built fields: construct without validation and serialize directly, since
+    # returning the model would have FastAPI validate it against response_model again
+    return make_model_response(HealthResponse.model_construct(
         status="healthy",
         timestamp=datetime.utcnow().isoformat(),
         version="1.0.0"
-    )
+    ))
 
 @app.get(
     "/debug/environment",
@@ -462,7 +502,7 @@ async def get_feature_flags():
     
     return {
         "success": True,
-        "features": get_feature_flags(),
+        "features": dict(get_feature_flags()),
         "tabMapping": TAB_MAPPING,
         "alwaysEnabled": ALWAYS_ENABLED_TABS
     }
@@ -894,8 +934,6 @@ async def speech_to_text(
             return VoiceInputResponse(
                 success=True,
                 text=canned_text,
-                transcription=canned_text,
-                transcript=canned_text,
                 error=None,
             )
 
@@ -911,8 +949,6 @@ async def speech_to_text(
         return VoiceInputResponse(
             success=success_flag,
             text=transcript_text,
-            transcription=transcript_text,
-             transcript=transcript_text,
             error=result.get("error")
         )
     except Exception as e:
@@ -932,6 +968,12 @@ async def text_to_speech(request: VoiceOutputRequest, http_request: Request):
     
     **Available voices**: alloy, echo, fable, onyx, nova, shimmer
     
+    **Response formats** (by `Accept` header):
+    - `audio/mpeg` (or `audio_format: "mp3"`): raw MP3 bytes
+    - `application/msgpack`: the JSON fields with raw `audio` bytes instead of base64 (only when the
+      optional `msgpack` package is installed; otherwise JSON is returned)
+    - otherwise: `VoiceOutputResponse` JSON with base64 audio
+    
     **Example usage**:
     ```bash
     curl -X POST "http://localhost:4000/voice/text-to-speech" \
@@ -972,16 +1014,31 @@ async def text_to_speech(request: VoiceOutputRequest, http_request: Request):
             if raw_audio:
                 return Response(content=raw_audio, media_type="audio/mpeg")
 
-        return VoiceOutputResponse(
+        # Binary envelope: same fields as the JSON response, raw audio instead of base64
+        if HAS_MSGPACK and "application/msgpack" in accept_lower:
+            raw_audio = audio_bytes
+            if not raw_audio and audio_base64:
+                raw_audio = base64.b64decode(audio_base64)
+            payload = {
+                "success": result["success"],
+                "audio": raw_audio,
+                "text": result.get("text", request.text),
+                "error": result.get("error"),
+                "persona": persona_config.get("id"),
+                "voice": result.get("voice") or selected_voice,
+                "metadata": metadata,
+            }
+            return Response(content=msgpack.packb(payload, use_bin_type=True), media_type="application/msgpack")
+
+        return make_model_response(VoiceOutputResponse(
             success=result["success"],
             audio_base64=audio_base64,
-            audioContent=audio_base64,
             text=result.get("text", request.text),
             error=result.get("error"),
             persona=persona_config.get("id"),
             voice=result.get("voice") or selected_voice,
             metadata=metadata,
-        )
+        ))
     except Exception as e:
         logger.error(f"Text-to-speech error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1064,14 +1121,16 @@ async def start_conversation(
         }
         persona_payload["voiceProfile"]["persona_id"] = persona_payload["id"]
         
-        return ConversationStartResponse(
+        # Fields are server-built strings/dicts: construct without validation and serialize
+        # directly (returning the model would be re-validated against response_model)
+        return make_model_response(ConversationStartResponse.model_construct(
             session_id=session_id,
             conversation_id=session_id,
             session_data=session_data,
             message="Conversation started successfully",
             persona=persona_payload,
             created_at=created_at,
-        )
+        ))
     except Exception as e:
         logger.error(f"Error starting conversation: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1481,14 +1540,14 @@ async def process_voice_agent_input(
         stt_result = await voice_processor.process_voice_input(audio_data, audio_file.content_type.split('/')[-1])
         
         if not stt_result["success"]:
-            return VoiceAgentProcessResponse(
+            return make_model_response(VoiceAgentProcessResponse(
                 success=False,
                 error="Speech-to-text failed",
                 user_input=None,
                 agent_response=None,
                 audio_response=None,
                 persona=persona,
-            )
+            ))
         
         user_text = stt_result["text"]
         
@@ -1514,7 +1573,7 @@ async def process_voice_agent_input(
         )
 
         if not tts_result.get("success", False):
-            return VoiceAgentProcessResponse(
+            return make_model_response(VoiceAgentProcessResponse(
                 success=False,
                 user_input=user_text,
                 agent_response=conversation_result.response,
@@ -1525,9 +1584,9 @@ async def process_voice_agent_input(
                 persona=conversation_result.persona,
                 voice=selected_voice,
                 error=tts_result.get("error", "Text-to-speech failed"),
-            )
+            ))
         
-        return VoiceAgentProcessResponse(
+        return make_model_response(VoiceAgentProcessResponse(
             success=True,
             user_input=user_text,
             agent_response=conversation_result.response,
@@ -1537,7 +1596,7 @@ async def process_voice_agent_input(
             actions=conversation_result.actions,
             persona=conversation_result.persona,
             voice=tts_result.get("voice") or selected_voice,
-        )
+        ))
         
     except Exception as e:
         logger.error(f"Voice agent processing error: {str(e)}")
@@ -4733,7 +4792,7 @@ async def list_scheduled_calls(
     - `call_type` (string, optional): Filter by call type
     
     **Returns:**
-    - List of scheduled call objects with all fields
+    - List of scheduled call objects (all fields except `promptContent`)
     """
     try:
         from databases.mongodb_scheduled_call_store import MongoDBScheduledCallStore
@@ -6500,15 +6559,14 @@ async def debug_messages():
                 "message": "Failed to get MongoDB database"
             }
         
-        collection = db["messages"]
+        message_store = MongoDBMessageStore()
+        collection = db[message_store.collection_name]
         
-        # Get raw message count
+        # Get raw message count (one document per message)
         total_messages = await collection.count_documents({})
         
         # Get sample messages
-        # Note: Messages are stored in an array within documents (one doc per agent_id)
         sample_messages = []
-        message_store = MongoDBMessageStore()
         all_messages = await message_store.get_all_messages(limit=5)
         for msg in all_messages[:5]:
             sample_messages.append({
@@ -6525,9 +6583,9 @@ async def debug_messages():
         # Get unique conversation_ids
         conversation_ids = await collection.distinct("conversation_id")
         
-        # Test get_conversations
+        # Test get_conversations (reports a count and a summary sample, so skip the message arrays)
         message_store = MongoDBMessageStore()
-        conversations = await message_store.get_conversations(limit=10)
+        conversations = await message_store.get_conversations(limit=10, include_messages=False)
         
         return {
             "mongodb_available": True,
@@ -6557,6 +6615,7 @@ async def debug_messages():
 async def get_all_messages(
     agent_id: Optional[str] = Query(None, description="Filter by agent/phone number"),
     limit: int = Query(100, description="Maximum number of conversations to return", ge=1, le=1000),
+    include_messages: bool = Query(True, description="Include each conversation's message array (false returns summaries only)"),
     user: Dict[str, Any] = Depends(get_current_active_user)
 ):
     """Get all message conversations grouped by conversation_id (user-filtered)"""
@@ -6592,7 +6651,8 @@ async def get_all_messages(
         conversations = await message_store.get_conversations_for_user(
             user_phone_numbers=user_phone_numbers,
             agent_id=agent_id,
-            limit=limit
+            limit=limit,
+            include_messages=include_messages
         )
         
         logger.info(f"✅ Retrieved {len(conversations)} conversation(s) from MongoDB")
@@ -8125,7 +8185,7 @@ async def http_exception_handler(request, exc):
             error=exc.detail,
             status_code=exc.status_code,
             timestamp=datetime.utcnow().isoformat()
-        ).dict()
+        ).model_dump()
     )
 
 @app.exception_handler(Exception)
@@ -8138,7 +8198,7 @@ async def general_exception_handler(request, exc):
             error="Internal server error",
             status_code=500,
             timestamp=datetime.utcnow().isoformat()
-        ).dict()
+        ).model_dump()
     )
 
 if __name__ == "__main__":
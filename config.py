@@ -16,6 +16,18 @@ MONGODB_URL = os.getenv("MONGODB_URL", "")
 MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "voiceagent")
 MONGODB_CONVERSATIONS_COLLECTION = os.getenv("MONGODB_CONVERSATIONS_COLLECTION", "conversations")
 
+# Connection pool: bursts of concurrent webhook writes queue behind the pool,
+# so keep it larger than the driver default (100) and fail fast when exhausted
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "200"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "20"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+
+# Message write batching (opt-in): with MONGO_MSG_BATCH_SIZE > 1, concurrent message inserts
+# are coalesced into one bulk_write of up to that many operations, waiting at most
+# MONGO_MSG_BATCH_MS for a batch to fill. The default of 1 writes each message individually.
+MONGO_MSG_BATCH_SIZE = int(os.getenv("MONGO_MSG_BATCH_SIZE", "1"))
+MONGO_MSG_BATCH_MS = int(os.getenv("MONGO_MSG_BATCH_MS", "5"))
+
 # ============================================================================
 # OPENAI CONFIGURATION
 # ============================================================================
@@ -156,9 +156,8 @@ class MongoDBAgentStore:
             
             if agent:
                 # Convert ObjectId to string and add as 'id'
-                agent_dict = dict(agent)
-                agent_dict["id"] = str(agent_dict["_id"])
-                del agent_dict["_id"]
+                agent_dict = agent  # Motor returns a fresh dict per document - rename _id in place
+                agent_dict["id"] = str(agent_dict.pop("_id"))
                 return agent_dict
             
             return None
@@ -192,9 +191,8 @@ class MongoDBAgentStore:
             agent = await collection.find_one(query)
             
             if agent:
-                agent_dict = dict(agent)
-                agent_dict["id"] = str(agent_dict["_id"])
-                del agent_dict["_id"]
+                agent_dict = agent  # Motor returns a fresh dict per document - rename _id in place
+                agent_dict["id"] = str(agent_dict.pop("_id"))
                 logger.debug(f"✅ Found agent by normalized phone: {normalized_phone}")
                 return agent_dict
             
@@ -205,9 +203,8 @@ class MongoDBAgentStore:
             async for doc in collection.find(search_query):
                 stored_phone = doc.get("phoneNumber", "")
                 if normalize_phone_number(stored_phone) == normalized_phone:
-                    agent_dict = dict(doc)
-                    agent_dict["id"] = str(agent_dict["_id"])
-                    del agent_dict["_id"]
+                    agent_dict = doc  # Motor returns a fresh dict per document - rename _id in place
+                    agent_dict["id"] = str(agent_dict.pop("_id"))
                     logger.info(f"✅ Found agent by normalized comparison: stored '{stored_phone}' matches '{normalized_phone}'")
                     return agent_dict
             
@@ -70,10 +70,12 @@ class MongoDBAnalytics:
             active_count = 0
             completed_count = 0
             
+            # Fallback for documents missing timestamps - computed once, not per document
+            now_iso = datetime.utcnow().isoformat()
             for conv in conversations:
                 # Calculate duration from created_at to updated_at
-                created = datetime.fromisoformat(conv.get("created_at", datetime.utcnow().isoformat()))
-                updated = datetime.fromisoformat(conv.get("updated_at", datetime.utcnow().isoformat()))
+                created = datetime.fromisoformat(conv.get("created_at", now_iso))
+                updated = datetime.fromisoformat(conv.get("updated_at", now_iso))
                 duration = (updated - created).total_seconds()
                 durations.append(duration)
                 
@@ -233,12 +235,27 @@ class MongoDBAnalytics:
             if collection is None:
                 return []
             
-            cursor = collection.find().sort("created_at", -1).limit(limit)
+            # Count messages with $size so the transcripts themselves are never shipped
+            cursor = collection.aggregate([
+                {"$sort": {"created_at": -1}},
+                {"$limit": limit},
+                {"$project": {
+                    "_id": 0,
+                    "session_id": 1,
+                    "agent_id": 1,
+                    "customer_id": 1,
+                    "status": 1,
+                    "created_at": 1,
+                    "updated_at": 1,
+                    "message_count": {"$size": {"$ifNull": ["$messages", []]}}
+                }}
+            ])
             calls = []
+            now_iso = datetime.utcnow().isoformat()
             
             async for doc in cursor:
-                created = datetime.fromisoformat(doc.get("created_at", datetime.utcnow().isoformat()))
-                updated = datetime.fromisoformat(doc.get("updated_at", datetime.utcnow().isoformat()))
+                created = datetime.fromisoformat(doc.get("created_at", now_iso))
+                updated = datetime.fromisoformat(doc.get("updated_at", now_iso))
                 duration = (updated - created).total_seconds()
                 
                 calls.append({
@@ -246,7 +263,7 @@ class MongoDBAnalytics:
                     "agent_id": doc.get("agent_id"),
                     "customer_id": doc.get("customer_id"),
                     "status": doc.get("status", "active"),
-                    "message_count": len(doc.get("messages", [])),
+                    "message_count": doc["message_count"],
                     "duration_seconds": round(duration, 2),
                     "created_at": doc.get("created_at"),
                     "updated_at": doc.get("updated_at"),
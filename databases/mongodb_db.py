@@ -22,7 +22,10 @@ def initialize_mongodb():
     global _mongo_client, _mongo_db, _mongo_available
     
     try:
-        from config import MONGODB_URL, MONGODB_DATABASE
+        from config import (
+            MONGODB_URL, MONGODB_DATABASE,
+            MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, MONGODB_WAIT_QUEUE_TIMEOUT_MS
+        )
         
         # Check if MongoDB URL is provided
         if not MONGODB_URL or MONGODB_URL.strip() == "":
@@ -34,10 +37,14 @@ def initialize_mongodb():
         # For mongodb+srv:// URLs, TLS is automatically enabled by MongoDB
         # Increase timeout for better reliability
         # tlsAllowInvalidCertificates=True is needed for macOS SSL certificate issues
+        # Pool is sized for bursts of concurrent webhook writes (see config.py)
         _mongo_client = AsyncIOMotorClient(
             MONGODB_URL,
             serverSelectionTimeoutMS=10000,  # 10 second timeout (increased from 5s)
-            tlsAllowInvalidCertificates=True  # Fix for macOS SSL certificate verification
+            tlsAllowInvalidCertificates=True,  # Fix for macOS SSL certificate verification
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS
         )
         
         # Get database
@@ -47,6 +54,7 @@ def initialize_mongodb():
         _mongo_available = True  # Assume available, will fail gracefully if not
         
         logger.info(f"MongoDB connection initialized successfully (database: {MONGODB_DATABASE})")
+        logger.info(f"MongoDB connection pool: min={MONGODB_MIN_POOL_SIZE}, max={MONGODB_MAX_POOL_SIZE}, wait timeout={MONGODB_WAIT_QUEUE_TIMEOUT_MS}ms")
         logger.info(f"MongoDB URL: {MONGODB_URL[:50]}..." if len(MONGODB_URL) > 50 else f"MongoDB URL: {MONGODB_URL}")
         return True
         
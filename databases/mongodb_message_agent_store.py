@@ -165,9 +165,8 @@ class MongoDBMessageAgentStore:
             
             if agent:
                 # Convert ObjectId to string and add as 'id'
-                agent_dict = dict(agent)
-                agent_dict["id"] = str(agent["_id"])
-                del agent_dict["_id"]
+                agent_dict = agent  # Motor returns a fresh dict per document - rename _id in place
+                agent_dict["id"] = str(agent_dict.pop("_id"))
                 return agent_dict
             
             return None
@@ -200,9 +199,8 @@ class MongoDBMessageAgentStore:
             
             if agent:
                 # Convert ObjectId to string and add as 'id'
-                agent_dict = dict(agent)
-                agent_dict["id"] = str(agent["_id"])
-                del agent_dict["_id"]
+                agent_dict = agent  # Motor returns a fresh dict per document - rename _id in place
+                agent_dict["id"] = str(agent_dict.pop("_id"))
                 return agent_dict
             
             return None
@@ -263,9 +261,8 @@ class MongoDBMessageAgentStore:
             agents = []
             async for doc in collection.find(query).sort("created_at", -1):
                 # Convert ObjectId to string
-                agent_dict = dict(doc)
-                agent_dict["id"] = str(doc["_id"])
-                del agent_dict["_id"]
+                agent_dict = doc  # Motor returns a fresh dict per document - rename _id in place
+                agent_dict["id"] = str(agent_dict.pop("_id"))
                 agents.append(agent_dict)
             
             logger.info(f"Retrieved {len(agents)} message agent(s) from MongoDB")
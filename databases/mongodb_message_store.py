@@ -2,22 +2,327 @@
 MongoDB Message Store
 Handles storing and retrieving SMS/text messages with conversation history
 Uses UUID for conversation_id to group messages in conversations
+Each message is its own document; a conversation is every message for an agent_id + user_number
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import logging
+import time
 import uuid
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from .mongodb_db import get_mongo_db, is_mongodb_available
 from .mongodb_phone_store import normalize_phone_number
 
+try:
+    from ciso8601 import parse_datetime
+    HAS_CISO8601 = True
+except ImportError:
+    HAS_CISO8601 = False
+
 logger = logging.getLogger(__name__)
 
+
+def _iso_timestamp(value: Any) -> str:
+    """Return a message timestamp as an ISO string with millisecond precision
+    (BSON Dates store milliseconds), matching _iso_timestamp_expr.
+    Messages store a native BSON Date; unmigrated legacy values are ISO strings already."""
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="milliseconds")
+    return value or ""
+
+
+def _iso_timestamp_expr(field: str) -> Dict[str, Any]:
+    """Aggregation counterpart of _iso_timestamp - renders BSON Dates as ISO strings"""
+    return {"$cond": [
+        {"$eq": [{"$type": field}, "date"]},
+        {"$dateToString": {"date": field, "format": "%Y-%m-%dT%H:%M:%S.%L"}},
+        {"$ifNull": [field, ""]}
+    ]}
+
+
+def _project_conversation(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Map one grouped conversation from the aggregation onto the UI shape.
+    Returns None for groups missing agent_id or user_number."""
+    agent_id = doc.get("agent_id")
+    user_number = doc.get("user_number")
+    if not agent_id or not user_number:
+        return None
+    
+    # $group yields one document per agent_id + user_number, so the
+    # composite ID is already unique - no client-side dedup needed
+    return {
+        "id": f"{agent_id}_{user_number}",
+        "conversation_id": doc.get("conversation_id") or str(uuid.uuid4()),
+        "phoneNumberId": agent_id,
+        "callerNumber": user_number,
+        "agentNumber": agent_id,
+        "status": "active",
+        "timestamp": doc["timestamp"],
+        "latest_message": doc["latest_message"],
+        "message_count": doc["message_count"],
+        "conversation": doc.get("conversation", [])
+    }
+
+
+# Cursor batch size for conversation listings and history reads: each conversation
+# carries its full message array, so pull them in bounded batches
+_CURSOR_BATCH_SIZE = 200
+
+
+# Fields returned for conversation history (the agent/user numbers are already known)
+_HISTORY_PROJECTION = {
+    "_id": 0,
+    "message_sid": 1,
+    "conversation_id": 1,
+    "role": 1,
+    "direction": 1,
+    "body": 1,
+    "timestamp": 1,
+}
+
+
+# In-process cache of the latest message time per (agent_id, user_number).
+# Bursty conversations look this up on every message; entries expire after a short TTL.
+_LAST_MESSAGE_TIME_TTL_SECONDS = 60
+_LAST_MESSAGE_TIME_CACHE_SIZE = 10000
+_last_message_time_cache: Dict[Tuple[str, str], Tuple[datetime, float]] = {}
+
+
+def _get_cached_last_message_time(key: Tuple[str, str]) -> Optional[datetime]:
+    """Return the cached last message time, or None if missing or expired"""
+    entry = _last_message_time_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[1] > _LAST_MESSAGE_TIME_TTL_SECONDS:
+        _last_message_time_cache.pop(key, None)
+        return None
+    return entry[0]
+
+
+def _set_cached_last_message_time(key: Tuple[str, str], value: datetime):
+    """Cache the last message time, evicting the oldest entry when full"""
+    _last_message_time_cache.pop(key, None)
+    if len(_last_message_time_cache) >= _LAST_MESSAGE_TIME_CACHE_SIZE:
+        _last_message_time_cache.pop(next(iter(_last_message_time_cache)))
+    _last_message_time_cache[key] = (value, time.monotonic())
+
+
+# Short-lived cache of conversation listings - dashboards poll the same listing
+# every few seconds. Each write bumps the agent's version (and the global version
+# used by unfiltered listings), so keys from before the write stop matching.
+_CONVERSATION_LIST_TTL_SECONDS = 3
+_CONVERSATION_LIST_CACHE_SIZE = 1024
+_conversation_list_cache: Dict[tuple, Tuple[List[Dict[str, Any]], float]] = {}
+_conversation_versions: Dict[Optional[str], int] = {}
+
+
+def _conversation_list_key(agents: Optional[Tuple[str, ...]], limit: int, include_messages: bool) -> tuple:
+    """Cache key for a listing over `agents` (None = every agent)"""
+    if agents is None:
+        versions = (_conversation_versions.get(None, 0),)
+    else:
+        versions = tuple(_conversation_versions.get(agent, 0) for agent in agents)
+    return (agents, limit, include_messages, versions)
+
+
+def _get_cached_conversation_list(key: tuple) -> Optional[List[Dict[str, Any]]]:
+    """Return a cached listing, or None if missing or expired"""
+    entry = _conversation_list_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[1] > _CONVERSATION_LIST_TTL_SECONDS:
+        _conversation_list_cache.pop(key, None)
+        return None
+    return list(entry[0])
+
+
+def _set_cached_conversation_list(key: tuple, conversations: List[Dict[str, Any]]):
+    """Cache a listing, evicting the oldest entry when full"""
+    _conversation_list_cache.pop(key, None)
+    if len(_conversation_list_cache) >= _CONVERSATION_LIST_CACHE_SIZE:
+        _conversation_list_cache.pop(next(iter(_conversation_list_cache)))
+    _conversation_list_cache[key] = (list(conversations), time.monotonic())
+
+
+def _invalidate_conversation_lists(agent_id: str):
+    """Make cached listings covering agent_id stale after a write"""
+    _conversation_versions[agent_id] = _conversation_versions.get(agent_id, 0) + 1
+    _conversation_versions[None] = _conversation_versions.get(None, 0) + 1
+
+
+# Legacy storage: one 'messages' document per agent_id + user_number with an embedded
+# `messages` array. migrate_legacy_messages() copies it into per-message documents and
+# records on each legacy document how many of its messages have been copied.
+_LEGACY_COLLECTION_NAME = "messages"
+_LEGACY_SCAN_BATCH_SIZE = 200
+_LEGACY_INSERT_BATCH_SIZE = 1000
+_LEGACY_UNMIGRATED_QUERY = {
+    "messages.0": {"$exists": True},
+    "$expr": {"$gt": [
+        {"$size": {"$cond": [{"$isArray": "$messages"}, "$messages", []]}},
+        {"$ifNull": ["$migrated_message_count", 0]}
+    ]}
+}
+
+# Fallbacks for legacy messages missing direction or role (same rules the
+# conversation listing applies on read)
+_ROLE_TO_DIRECTION = {"user": "inbound", "customer": "inbound", "assistant": "outbound", "system": "outbound"}
+_DIRECTION_TO_ROLE = {"inbound": "user", "outbound": "assistant"}
+
+
+def _parse_legacy_timestamp(value):
+    """Parse a legacy ISO string timestamp into a naive UTC datetime"""
+    if not isinstance(value, str) or not value:
+        return value
+    try:
+        if HAS_CISO8601:
+            parsed = parse_datetime(value)  # C parser, handles 'Z' natively
+        else:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        return parsed.replace(tzinfo=None)
+    except ValueError:
+        return value
+
+
+def _legacy_message_doc(legacy_id, index: int, agent_id, user_number,
+                        msg: Dict[str, Any], conversation_id: str) -> Dict[str, Any]:
+    """Turn a legacy embedded message into a per-message document.
+    The _id is derived from the legacy document and array position, so copying the
+    same message twice collides on _id even when it has no message_sid.
+    Updates msg in place - each legacy document is read once and not reused."""
+    msg["_id"] = f"legacy:{legacy_id}:{index}"
+    msg["agent_id"] = agent_id
+    msg["user_number"] = user_number
+    if not msg.get("conversation_id"):
+        msg["conversation_id"] = conversation_id
+    msg["timestamp"] = _parse_legacy_timestamp(msg.get("timestamp"))
+    if not msg.get("direction") or not msg.get("role"):
+        direction = msg.get("direction") or _ROLE_TO_DIRECTION.get(msg.get("role"), "outbound")
+        msg["direction"] = direction
+        msg["role"] = msg.get("role") or _DIRECTION_TO_ROLE.get(direction, "assistant")
+    return msg
+
+
+class _MessageWriteBatcher:
+    """Coalesces concurrent message inserts into unordered bulk_write calls."""
+    
+    def __init__(self, batch_size: int, batch_ms: int):
+        self.batch_size = max(1, batch_size)
+        self.batch_window = max(0, batch_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        # Flushes run as their own tasks; hold references so they are not garbage collected
+        self._inflight: set = set()
+    
+    async def submit(self, collection, operation: InsertOne):
+        """Queue a write and wait for it to complete.
+        
+        Raises:
+            DuplicateKeyError if the write collided with a unique index
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        if self.batch_size == 1:
+            await self._flush([(collection, operation, future)])
+            return await future
+        
+        # (Re)start the collector on the running event loop
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._inflight = set()
+            self._task = loop.create_task(self._run())
+        
+        await self._queue.put((collection, operation, future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches until the event loop shuts down"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Flush in the background so a slow bulk_write never holds up the next batch
+            task = loop.create_task(self._flush(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+    
+    async def _flush(self, batch):
+        """Write a batch with one bulk_write per target collection"""
+        groups: Dict[int, list] = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+        await asyncio.gather(*(self._write_group(items) for items in groups.values()))
+    
+    async def _write_group(self, items):
+        """Write items sharing a collection and resolve each caller's future with its own outcome"""
+        collection = items[0][0]
+        errors = {}
+        try:
+            await collection.bulk_write([item[1] for item in items], ordered=False)
+        except BulkWriteError as e:
+            errors = {err["index"]: err for err in e.details.get("writeErrors", [])}
+        except Exception as e:
+            for item in items:
+                if not item[2].done():
+                    item[2].set_exception(e)
+            return
+        
+        for index, item in enumerate(items):
+            future = item[2]
+            if future.done():
+                continue
+            error = errors.get(index)
+            if error is None:
+                future.set_result(None)
+            elif error.get("code") == 11000:
+                future.set_exception(DuplicateKeyError(error.get("errmsg", ""), 11000, error))
+            else:
+                future.set_exception(OperationFailure(error.get("errmsg", ""), error.get("code"), error))
+
+
+_message_batcher: Optional[_MessageWriteBatcher] = None
+
+
+def _get_message_batcher() -> _MessageWriteBatcher:
+    """Get the process-wide message write batcher (shared by all store instances)"""
+    global _message_batcher
+    if _message_batcher is None:
+        from config import MONGO_MSG_BATCH_SIZE, MONGO_MSG_BATCH_MS
+        _message_batcher = _MessageWriteBatcher(MONGO_MSG_BATCH_SIZE, MONGO_MSG_BATCH_MS)
+    return _message_batcher
+
+
 class MongoDBMessageStore:
-    """Store and retrieve SMS/text messages from MongoDB"""
+    """Store and retrieve SMS/text messages from MongoDB
+    
+    Writes arrive in bursts from webhooks and campaigns; the shared client's
+    connection pool (MONGODB_MAX_POOL_SIZE) should cover the expected concurrency."""
+    
+    # Indexes only need to be created once per process
+    _indexes_ensured = False
+    # Resolved collection, shared across instances (handlers create a store per
+    # request); re-resolved if MongoDB is re-initialized with a new database
+    _collection = None
+    _collection_db = None
     
     def __init__(self):
-        self.collection_name = "messages"
+        self.collection_name = "conversation_messages"
     
     def _get_collection(self):
         """Get MongoDB collection - creates collection if it doesn't exist"""
@@ -25,15 +330,159 @@ class MongoDBMessageStore:
         if db is None:
             logger.warning(f"MongoDB database not available, cannot get collection '{self.collection_name}'")
             return None
+        if MongoDBMessageStore._collection_db is db:
+            return MongoDBMessageStore._collection
         # Accessing the collection will create it if it doesn't exist (MongoDB auto-creates)
         try:
-            collection = db[self.collection_name]
+            MongoDBMessageStore._collection = db[self.collection_name]
+            MongoDBMessageStore._collection_db = db
             logger.debug(f"Accessed MongoDB collection '{self.collection_name}'")
-            return collection
+            return MongoDBMessageStore._collection
         except Exception as e:
             logger.error(f"Error accessing collection '{self.collection_name}': {e}", exc_info=True)
             return None
     
+    async def ensure_indexes(self) -> bool:
+        """Create the indexes used by the hot lookup paths (idempotent)"""
+        if MongoDBMessageStore._indexes_ensured:
+            return True
+        if not is_mongodb_available():
+            return False
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            # Conversation reads: equality on agent_id + user_number, range/sort on timestamp
+            await collection.create_index(
+                [("agent_id", 1), ("user_number", 1), ("timestamp", 1)],
+                name="agent_user_ts_idx",
+                background=True
+            )
+            # Agent-wide message listings sorted by time
+            await collection.create_index(
+                [("agent_id", 1), ("timestamp", -1)],
+                name="agent_ts_idx",
+                background=True
+            )
+            # Duplicate message_sid protection within a conversation
+            await collection.create_index(
+                [("agent_id", 1), ("user_number", 1), ("message_sid", 1)],
+                name="agent_user_msgsid_idx",
+                unique=True,
+                partialFilterExpression={"message_sid": {"$type": "string"}},
+                background=True
+            )
+            # Conversation lookups by id (GET /api/messages/{conversation_id}) carry no agent_id
+            await collection.create_index(
+                [("conversation_id", 1)],
+                name="conversation_idx",
+                background=True
+            )
+            MongoDBMessageStore._indexes_ensured = True
+            logger.info(f"✅ Indexes ensured on '{self.collection_name}' collection")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not ensure indexes on '{self.collection_name}': {e}")
+            return False
+    
+    async def has_unmigrated_legacy_messages(self) -> bool:
+        """Return True if the legacy 'messages' collection holds messages not yet copied"""
+        if not is_mongodb_available():
+            return False
+        db = get_mongo_db()
+        if db is None:
+            return False
+        doc = await db[_LEGACY_COLLECTION_NAME].find_one(_LEGACY_UNMIGRATED_QUERY, projection={"_id": 1})
+        return doc is not None
+    
+    async def migrate_legacy_messages(self) -> bool:
+        """Copy messages still embedded in the legacy 'messages' collection (idempotent).
+        
+        Messages already copied are skipped: each copy has a deterministic _id, and
+        live writes are caught by the unique message_sid index. The legacy documents
+        are only annotated with migrated_message_count, never modified otherwise.
+        
+        Returns:
+            True if nothing is left to migrate (or MongoDB is not configured), False on failure
+        """
+        if not is_mongodb_available():
+            return True
+        db = get_mongo_db()
+        collection = self._get_collection()
+        if db is None or collection is None:
+            return False
+        
+        try:
+            if not await self.has_unmigrated_legacy_messages():
+                return True
+            
+            # The unique message_sid index must exist before copying
+            if not await self.ensure_indexes():
+                logger.error(f"❌ Cannot migrate legacy messages: indexes on '{self.collection_name}' are missing")
+                return False
+            
+            legacy = db[_LEGACY_COLLECTION_NAME]
+            logger.warning(f"📦 Migrating legacy '{_LEGACY_COLLECTION_NAME}' collection into '{self.collection_name}'...")
+            copied = 0
+            skipped = 0
+            
+            async def flush(message_docs, migrated_counts):
+                """Insert a batch, then record how many messages each legacy document has copied"""
+                nonlocal copied, skipped
+                try:
+                    result = await collection.insert_many(message_docs, ordered=False)
+                    copied += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    errors = e.details.get("writeErrors", [])
+                    if any(err.get("code") != 11000 for err in errors):
+                        raise
+                    copied += e.details.get("nInserted", 0)
+                    skipped += len(errors)
+                await legacy.bulk_write(
+                    [UpdateOne({"_id": legacy_id}, {"$set": {"migrated_message_count": count}})
+                     for legacy_id, count in migrated_counts],
+                    ordered=False
+                )
+            
+            # Messages from several conversations share one insert_many round trip;
+            # a legacy document's messages never span two batches
+            batch = []
+            migrated_counts = []
+            cursor = legacy.find(
+                _LEGACY_UNMIGRATED_QUERY, projection={"agent_id": 1, "user_number": 1, "messages": 1}
+            ).batch_size(_LEGACY_SCAN_BATCH_SIZE)
+            async for doc in cursor:
+                agent_id = doc.get("agent_id")
+                user_number = doc.get("user_number")
+                messages = doc.get("messages", [])
+                # Messages without a conversation_id join the conversation's latest one
+                conversation_id = next(
+                    (m["conversation_id"] for m in reversed(messages) if m.get("conversation_id")),
+                    None
+                ) or str(uuid.uuid4())
+                batch.extend(
+                    _legacy_message_doc(doc["_id"], index, agent_id, user_number, msg, conversation_id)
+                    for index, msg in enumerate(messages)
+                )
+                migrated_counts.append((doc["_id"], len(messages)))
+                if len(batch) >= _LEGACY_INSERT_BATCH_SIZE:
+                    await flush(batch, migrated_counts)
+                    batch = []
+                    migrated_counts = []
+            
+            if batch:
+                await flush(batch, migrated_counts)
+            
+            logger.warning(f"✅ Migrated {copied} legacy message(s) into '{self.collection_name}' ({skipped} already present)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error migrating legacy messages into '{self.collection_name}': {e}", exc_info=True)
+            return False
+    
     async def get_or_create_conversation_id(self, from_number: str, to_number: str, agent_id: str, 
                                             force_new: bool = False) -> tuple[Optional[str], bool]:
         """Get existing conversation_id or create a new one with UUID.
@@ -51,20 +500,24 @@ class MongoDBMessageStore:
             - conversation_id: UUID for the conversation
             - is_new_conversation: True if this is a new conversation (should send greeting)
         """
+        return await self._resolve_conversation_id(
+            normalize_phone_number(agent_id), normalize_phone_number(from_number), force_new
+        )
+    
+    async def _resolve_conversation_id(self, normalized_agent: str, normalized_user: str,
+                                       force_new: bool = False) -> tuple[Optional[str], bool]:
+        """get_or_create_conversation_id for already-normalized phone numbers"""
         if not is_mongodb_available():
             return None, False
         
         try:
-            normalized_from = normalize_phone_number(from_number)
-            normalized_agent = normalize_phone_number(agent_id)
-            
             # Check last message time to determine greeting and conversation status
-            last_msg_time = await self.get_last_message_time(normalized_agent, normalized_from)
+            last_msg_time = await self._get_last_message_time_normalized(normalized_agent, normalized_user)
             
             if last_msg_time is None:
                 # No previous messages - this is a brand new conversation
                 new_conversation_id = str(uuid.uuid4())
-                logger.info(f"🆕 No previous messages - creating NEW conversation: {new_conversation_id}")
+                logger.info("🆕 No previous messages - creating NEW conversation: %s", new_conversation_id)
                 return new_conversation_id, True  # New conv + greeting
             
             # Calculate time since last message
@@ -73,29 +526,29 @@ class MongoDBMessageStore:
             hours_since_last = time_since_last.total_seconds() / 3600
             days_since_last = time_since_last.days
             
-            logger.info(f"📅 Time since last message: {minutes_since_last:.1f} minutes ({hours_since_last:.1f} hours, {days_since_last} days)")
+            logger.info("📅 Time since last message: %.1f minutes (%.1f hours, %s days)", minutes_since_last, hours_since_last, days_since_last)
             
             if days_since_last >= 1 or force_new:
                 # More than 1 day since last message - create NEW conversation + greeting
                 new_conversation_id = str(uuid.uuid4())
-                logger.info(f"🆕 Last message > 1 day ago - creating NEW conversation: {new_conversation_id}")
+                logger.info("🆕 Last message > 1 day ago - creating NEW conversation: %s", new_conversation_id)
                 return new_conversation_id, True  # New conv + greeting
             
             # Get existing conversation ID
-            existing_id = await self.get_conversation_id(from_number, to_number, agent_id)
+            existing_id = await self._get_conversation_id_normalized(normalized_agent, normalized_user)
             if not existing_id:
                 # Fallback - create new if no existing ID found
                 new_conversation_id = str(uuid.uuid4())
-                logger.info(f"🆕 No existing conversation_id found - creating NEW: {new_conversation_id}")
+                logger.info("🆕 No existing conversation_id found - creating NEW: %s", new_conversation_id)
                 return new_conversation_id, True  # New conv + greeting
             
             if minutes_since_last < 30:
                 # Less than 30 minutes - active chat, no greeting
-                logger.info(f"✅ Active chat (< 30 min) - continuing conversation: {existing_id}, NO greeting")
+                logger.info("✅ Active chat (< 30 min) - continuing conversation: %s, NO greeting", existing_id)
                 return existing_id, False  # Same conv, no greeting
             else:
                 # 30 min to 1 day - re-engaging after break, send greeting but same conversation
-                logger.info(f"👋 Re-engaging (30 min - 1 day gap) - continuing conversation: {existing_id}, WITH greeting")
+                logger.info("👋 Re-engaging (30 min - 1 day gap) - continuing conversation: %s, WITH greeting", existing_id)
                 return existing_id, True  # Same conv + greeting
             
         except Exception as e:
@@ -103,7 +556,9 @@ class MongoDBMessageStore:
             return None, False
     
     async def check_message_exists(self, message_sid: str, agent_id: str, user_number: Optional[str] = None) -> bool:
-        """Check if a message with the given message_sid already exists for this agent_id + user_number"""
+        """Check if a message with the given message_sid already exists for this agent_id + user_number.
+        Not needed before writes - create_message/create_outbound_message rely on the
+        unique agent_user_msgsid_idx index and return False for duplicates."""
         if not is_mongodb_available():
             return False
         
@@ -113,193 +568,110 @@ class MongoDBMessageStore:
                 return False
             
             # Build query - if user_number provided, use compound key
-            query = {"agent_id": agent_id, "messages.message_sid": message_sid}
+            query = {"agent_id": agent_id, "message_sid": message_sid}
             if user_number:
                 query["user_number"] = user_number
             
-            existing = await collection.find_one(query)
-            return existing is not None
+            count = await collection.count_documents(query, limit=1)
+            return count > 0
             
         except Exception as e:
             logger.error(f"Error checking message existence: {e}")
             return False
     
-    async def create_message(self, message_sid: str, from_number: str, to_number: str, 
-                            body: str, agent_id: Optional[str] = None, 
-                            conversation_id: Optional[str] = None,
-                            channel: str = "sms") -> bool:
-        """Add a new message to the conversation document.
-        Document structure: { agent_id, user_number, messages: [...] }
-        One document per agent_id + user_number combination."""
+    async def _write_message(self, message_sid: str, agent_number: str, user_number: str,
+                             body: str, agent_id: Optional[str], conversation_id: Optional[str],
+                             channel: str, direction: str, role: str, status: str,
+                             campaign_id: Optional[str] = None) -> bool:
+        """Store a message in the agent_id + user_number conversation.
+        Shared write path for inbound and outbound messages - callers map their
+        from/to numbers onto the agent and user sides."""
         if not is_mongodb_available():
-            logger.error("MongoDB not available, skipping message creation")
+            logger.error(f"MongoDB not available, skipping {direction} message creation")
             return False
         
         try:
             collection = self._get_collection()
             if collection is None:
-                logger.error("Failed to get MongoDB collection 'messages'")
+                logger.error(f"Failed to get MongoDB collection '{self.collection_name}'")
                 return False
             
-            logger.info(f"📦 Collection 'messages' accessed/created successfully")
-            
-            now = datetime.utcnow().isoformat()
-            agent_id = agent_id or to_number
-            normalized_user = normalize_phone_number(from_number)
-            normalized_agent = normalize_phone_number(agent_id)
-            
-            # Check for duplicate message_sid within this conversation
-            if await self.check_message_exists(message_sid, normalized_agent, normalized_user):
-                logger.warning(f"⚠️ Message with message_sid {message_sid} already exists, skipping duplicate")
-                return False
-            
-            # Check if conversation exists with agent_id + user_number
-            conversation_exists = await self.check_conversation_exists(normalized_agent, normalized_user)
-            
-            if conversation_exists:
-                logger.info(f"✅ Found existing conversation for agent_id={normalized_agent}, user_number={normalized_user}")
-            else:
-                logger.info(f"🆕 Creating new conversation entry for agent_id={normalized_agent}, user_number={normalized_user}")
+            now = datetime.utcnow()
+            normalized_agent = normalize_phone_number(agent_id or agent_number)
+            normalized_user = normalize_phone_number(user_number)
             
             # Get or create conversation_id if not provided
             if not conversation_id:
-                logger.info(f"🔍 Getting or creating conversation_id for {from_number} <-> {to_number} (agent: {normalized_agent})")
-                conversation_id, _ = await self.get_or_create_conversation_id(from_number, to_number, normalized_agent)
+                logger.info("🔍 Getting or creating conversation_id for %s message %s <-> %s (agent: %s)", direction, user_number, agent_number, normalized_agent)
+                conversation_id, _ = await self._resolve_conversation_id(normalized_agent, normalized_user)
                 if not conversation_id:
-                    logger.error(f"❌ Could not get or create conversation_id for message {message_sid}")
+                    logger.error(f"❌ Could not get or create conversation_id for {direction} message {message_sid}")
                     return False
-                logger.info(f"✅ Conversation ID: {conversation_id}")
+                logger.info("✅ Conversation ID: %s", conversation_id)
             
-            # Create message object
-            # For inbound messages: from_number is user, to_number is agent
-            message_obj = {
+            message_doc = {
+                "agent_id": normalized_agent,
+                "user_number": normalized_user,
                 "message_sid": message_sid,
-                "agent_number": to_number,    # Agent receives the message
+                "agent_number": agent_number,
                 "body": body,
                 "conversation_id": conversation_id,
-                "direction": "inbound",  # Inbound from user
-                "role": "user",  # Added role field: inbound = user
-                "status": "received",
-                "timestamp": now,
+                "direction": direction,
+                "role": role,
+                "status": status,
+                "timestamp": now,  # Native BSON Date so range filters/sorts run in MongoDB
                 "channel": channel,  # Track message channel (sms or whatsapp)
             }
+            if direction == "outbound":
+                message_doc["campaign_id"] = campaign_id  # Link to campaign if from campaign
+            
+            # One document per message; a repeated message_sid in the same conversation
+            # collides with the unique agent_user_msgsid_idx index
+            try:
+                # Concurrent writes are coalesced into a single bulk_write
+                await _get_message_batcher().submit(collection, InsertOne(message_doc))
+            except DuplicateKeyError:
+                logger.warning("⚠️ %s message with message_sid %s already exists, skipping duplicate", direction.capitalize(), message_sid)
+                return False
             
-            # Upsert: Update if document exists, insert if it doesn't
-            # One document per agent_id + user_number combination
-            result = await collection.update_one(
-                {
-                    "agent_id": normalized_agent,
-                    "user_number": normalized_user
-                },
-                {
-                    "$push": {"messages": message_obj},
-                    "$set": {
-                        "updated_at": now,
-                        "agent_id": normalized_agent,  # Ensure agent_id is set
-                        "user_number": normalized_user  # Ensure user_number is set
-                    },
-                    "$setOnInsert": {
-                        "created_at": now
-                    }
-                },
-                upsert=True
-            )
-            
-            logger.info(f"✅ Added message {message_sid} to conversation (agent_id={normalized_agent}, user_number={normalized_user}) (upserted: {result.upserted_id is not None})")
+            _set_cached_last_message_time((normalized_agent, normalized_user), now)
+            _invalidate_conversation_lists(normalized_agent)
+            logger.info("✅ Added %s message %s to conversation (agent_id=%s, user_number=%s)", direction, message_sid, normalized_agent, normalized_user)
             return True
             
         except Exception as e:
-            logger.error(f"❌ Error creating message record: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
+            logger.error(f"❌ Error creating {direction} message record: {e}", exc_info=True)
             return False
     
+    async def create_message(self, message_sid: str, from_number: str, to_number: str, 
+                            body: str, agent_id: Optional[str] = None, 
+                            conversation_id: Optional[str] = None,
+                            channel: str = "sms") -> bool:
+        """Add a new inbound message to the conversation.
+        For inbound messages: from_number is user, to_number is agent."""
+        return await self._write_message(message_sid, to_number, from_number, body, agent_id,
+                                         conversation_id, channel, "inbound", "user", "received")
+    
     async def create_outbound_message(self, message_sid: str, from_number: str, to_number: str,
                                      body: str, agent_id: Optional[str] = None,
                                      conversation_id: Optional[str] = None,
                                      channel: str = "sms",
                                      campaign_id: Optional[str] = None) -> bool:
-        """Add a new outbound message to the conversation document.
-        Document structure: { agent_id, user_number, messages: [...] }
-        One document per agent_id + user_number combination."""
-        if not is_mongodb_available():
-            logger.error("MongoDB not available, skipping outbound message creation")
-            return False
-        
-        try:
-            collection = self._get_collection()
-            if collection is None:
-                logger.error("Failed to get MongoDB collection 'messages'")
-                return False
-            
-            now = datetime.utcnow().isoformat()
-            agent_id = agent_id or from_number
-            normalized_agent = normalize_phone_number(agent_id)
-            normalized_user = normalize_phone_number(to_number)  # to_number is the user for outbound
-            
-            # Check for duplicate message_sid within this conversation
-            if await self.check_message_exists(message_sid, normalized_agent, normalized_user):
-                logger.warning(f"⚠️ Outbound message with message_sid {message_sid} already exists, skipping duplicate")
-                return False
-            
-            # Get or create conversation_id if not provided
-            if not conversation_id:
-                logger.info(f"🔍 Getting or creating conversation_id for outbound message {from_number} -> {to_number} (agent: {normalized_agent})")
-                # For outbound, we need to find conversation where from_number is the agent and to_number is the user
-                conversation_id, _ = await self.get_or_create_conversation_id(to_number, from_number, normalized_agent)
-                if not conversation_id:
-                    logger.error(f"❌ Could not get or create conversation_id for outbound message {message_sid}")
-                    return False
-                logger.info(f"✅ Conversation ID: {conversation_id}")
-            
-            # Create message object
-            # For outbound messages: from_number is agent, to_number is user
-            message_obj = {
-                "message_sid": message_sid,
-                "agent_number": from_number,  # Agent sends the message
-                "body": body,
-                "conversation_id": conversation_id,
-                "direction": "outbound",  # Outbound from agent
-                "role": "assistant",  # Added role field: outbound = assistant
-                "status": "sent",
-                "timestamp": now,
-                "channel": channel,  # Track message channel (sms or whatsapp)
-                "campaign_id": campaign_id,  # Link to campaign if from campaign
-            }
-            
-            # Upsert: Update if document exists, insert if it doesn't
-            # One document per agent_id + user_number combination
-            result = await collection.update_one(
-                {
-                    "agent_id": normalized_agent,
-                    "user_number": normalized_user
-                },
-                {
-                    "$push": {"messages": message_obj},
-                    "$set": {
-                        "updated_at": now,
-                        "agent_id": normalized_agent,  # Ensure agent_id is set
-                        "user_number": normalized_user  # Ensure user_number is set
-                    },
-                    "$setOnInsert": {
-                        "created_at": now
-                    }
-                },
-                upsert=True
-            )
-            
-            logger.info(f"✅ Added outbound message {message_sid} to conversation (agent_id={normalized_agent}, user_number={normalized_user}) (upserted: {result.upserted_id is not None})")
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error creating outbound message record: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
-            return False
+        """Add a new outbound message to the conversation.
+        For outbound messages: from_number is agent, to_number is user."""
+        return await self._write_message(message_sid, from_number, to_number, body, agent_id,
+                                         conversation_id, channel, "outbound", "assistant", "sent",
+                                         campaign_id=campaign_id)
     
     async def get_conversation_id(self, from_number: str, to_number: str, agent_id: str) -> Optional[str]:
         """Get existing conversation_id for two phone numbers
         from_number = user_number, to_number = agent_number"""
+        return await self._get_conversation_id_normalized(
+            normalize_phone_number(agent_id), normalize_phone_number(from_number)  # from_number is user
+        )
+    
+    async def _get_conversation_id_normalized(self, normalized_agent: str, normalized_user: str) -> Optional[str]:
+        """get_conversation_id for already-normalized phone numbers"""
         if not is_mongodb_available():
             return None
         
@@ -308,31 +680,17 @@ class MongoDBMessageStore:
             if collection is None:
                 return None
             
-            # Normalize phone numbers
-            normalized_agent = normalize_phone_number(agent_id)
-            normalized_user = normalize_phone_number(from_number)  # from_number is user
-            
-            # Get the document for this agent_id + user_number combination
-            doc = await collection.find_one({
-                "agent_id": normalized_agent,
-                "user_number": normalized_user
-            })
+            # Get conversation_id from the most recent message
+            doc = await collection.find_one(
+                {"agent_id": normalized_agent, "user_number": normalized_user},
+                projection={"conversation_id": 1, "_id": 0},
+                sort=[("timestamp", -1)]
+            )
             
             if not doc:
                 return None
             
-            # Get conversation_id from the most recent message
-            messages_array = doc.get("messages", [])
-            if not messages_array:
-                return None
-            
-            # Get conversation_id from the most recent message
-            for msg in reversed(messages_array):  # Check most recent first
-                        conversation_id = msg.get("conversation_id")
-                        if conversation_id:
-                            return conversation_id
-            
-            return None
+            return doc.get("conversation_id")
             
         except Exception as e:
             logger.error(f"Error getting conversation_id: {e}")
@@ -348,6 +706,12 @@ class MongoDBMessageStore:
         Returns:
             datetime of last message, or None if no messages exist
         """
+        return await self._get_last_message_time_normalized(
+            normalize_phone_number(agent_id), normalize_phone_number(user_number)
+        )
+    
+    async def _get_last_message_time_normalized(self, normalized_agent: str, normalized_user: str) -> Optional[datetime]:
+        """get_last_message_time for already-normalized phone numbers"""
         if not is_mongodb_available():
             return None
         
@@ -356,39 +720,39 @@ class MongoDBMessageStore:
             if collection is None:
                 return None
             
-            normalized_agent = normalize_phone_number(agent_id)
-            normalized_user = normalize_phone_number(user_number)
-            
-            # Get the document for this agent_id + user_number combination
-            doc = await collection.find_one({
-                "agent_id": normalized_agent,
-                "user_number": normalized_user
-            })
+            cached_time = _get_cached_last_message_time((normalized_agent, normalized_user))
+            if cached_time is not None:
+                logger.info("📅 Last message time for agent=%s, user=%s: %s (cached)", normalized_agent, normalized_user, cached_time)
+                return cached_time
+            
+            # Newest message first - a covered query on agent_user_ts_idx (only indexed fields
+            # are projected). The _id can't stand in for the time: messages copied from the
+            # legacy collection have string 'legacy:<doc>:<index>' _ids, not ObjectIds.
+            doc = await collection.find_one(
+                {"agent_id": normalized_agent, "user_number": normalized_user},
+                projection={"timestamp": 1, "_id": 0},
+                sort=[("timestamp", -1)]
+            )
             
             if not doc:
-                logger.info(f"📅 No conversation found for agent={normalized_agent}, user={normalized_user}")
+                logger.info("📅 No conversation found for agent=%s, user=%s", normalized_agent, normalized_user)
                 return None
             
-            # Get messages array and find the most recent timestamp
-            messages_array = doc.get("messages", [])
-            if not messages_array:
-                logger.info(f"📅 Conversation exists but no messages for agent={normalized_agent}, user={normalized_user}")
+            timestamp = doc.get("timestamp")
+            if not timestamp:
                 return None
             
-            # Find the most recent message timestamp
-            latest_time = None
-            for msg in messages_array:
-                timestamp_str = msg.get("timestamp")
-                if timestamp_str:
-                    try:
-                        msg_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                        if latest_time is None or msg_time > latest_time:
-                            latest_time = msg_time
-                    except Exception as parse_error:
-                        logger.warning(f"Could not parse timestamp '{timestamp_str}': {parse_error}")
-            
-            if latest_time:
-                logger.info(f"📅 Last message time for agent={normalized_agent}, user={normalized_user}: {latest_time.isoformat()}")
+            if isinstance(timestamp, datetime):
+                latest_time = timestamp
+            else:
+                try:
+                    latest_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                except Exception as parse_error:
+                    logger.warning("Could not parse timestamp '%s': %s", timestamp, parse_error)
+                    return None
+            
+            logger.info("📅 Last message time for agent=%s, user=%s: %s", normalized_agent, normalized_user, latest_time)
+            _set_cached_last_message_time((normalized_agent, normalized_user), latest_time)
             
             return latest_time
             
@@ -408,30 +772,18 @@ class MongoDBMessageStore:
             
             normalized_agent = normalize_phone_number(agent_id)
             
-            # Get all documents for this agent_id (multiple documents, one per user_number)
-            cursor = collection.find({"agent_id": normalized_agent})
-            
-            all_messages = []
-            async for doc in cursor:
-                messages_array = doc.get("messages", [])
-                user_number = doc.get("user_number", "")
-                
-                # Add user_number and agent_id to each message
-                for msg in messages_array:
-                    msg["agent_id"] = normalized_agent
-                    msg["user_number"] = user_number  # Add user_number from document level
-                    # Ensure role field exists
-                    if "role" not in msg:
-                        msg["role"] = "user" if msg.get("direction") == "inbound" else "assistant"
-                    all_messages.append(msg)
-            
-            # Sort messages by timestamp (chronological order)
-            all_messages.sort(key=lambda x: x.get("timestamp", ""))
-            
-            # Apply limit
-            messages = all_messages[:limit]
-            
-            logger.info(f"Retrieved {len(messages)} messages for agent_id: {normalized_agent}")
+            # Timestamps are rendered as ISO strings by the server, so there is
+            # no per-message Python pass over the results
+            cursor = collection.aggregate([
+                {"$match": {"agent_id": normalized_agent}},
+                {"$sort": {"timestamp": 1}},
+                {"$limit": limit},
+                {"$project": {"_id": 0}},
+                {"$addFields": {"timestamp": _iso_timestamp_expr("$timestamp")}}
+            ])
+            messages = await cursor.to_list(length=limit)
+            
+            logger.info("Retrieved %s messages for agent_id: %s", len(messages), normalized_agent)
             return messages
             
         except Exception as e:
@@ -439,7 +791,7 @@ class MongoDBMessageStore:
             return []
     
     async def check_conversation_exists(self, agent_id: str, user_number: str) -> bool:
-        """Check if a conversation document exists for agent_id + user_number combination"""
+        """Check if any message exists for agent_id + user_number combination"""
         if not is_mongodb_available():
             return False
         
@@ -452,13 +804,14 @@ class MongoDBMessageStore:
             normalized_agent = normalize_phone_number(agent_id)
             normalized_user = normalize_phone_number(user_number)
             
-            # Check if document exists with both agent_id and user_number
-            doc = await collection.find_one({
-                "agent_id": normalized_agent,
-                "user_number": normalized_user
-            })
+            # Check if a message exists with both agent_id and user_number
+            # count_documents with limit=1 stops at the first agent_user_ts_idx entry
+            count = await collection.count_documents(
+                {"agent_id": normalized_agent, "user_number": normalized_user},
+                limit=1
+            )
             
-            return doc is not None
+            return count > 0
             
         except Exception as e:
             logger.error(f"Error checking conversation existence: {e}")
@@ -480,40 +833,28 @@ class MongoDBMessageStore:
             
             # Calculate 24 hours ago timestamp
             now = datetime.utcnow()
-            twenty_four_hours_ago = now - timedelta(hours=24)
-            cutoff_timestamp = twenty_four_hours_ago.isoformat()
-            
-            logger.info(f"📅 Getting messages from last 24 hours (since {cutoff_timestamp})")
-            logger.info(f"   agent_id: {normalized_agent}, user_number: {normalized_user}")
-            
-            # Get the document for this agent_id + user_number combination
-            doc = await collection.find_one({
-                "agent_id": normalized_agent,
-                "user_number": normalized_user
-            })
-            
-            if not doc:
-                logger.info(f"No document found for agent_id={normalized_agent}, user_number={normalized_user}")
-                return []
+            cutoff = now - timedelta(hours=24)
+            cutoff_timestamp = cutoff.isoformat()
             
-            # Filter messages by timestamp (last 24 hours)
-            messages_array = doc.get("messages", [])
+            logger.info("📅 Getting messages from last 24 hours (since %s)", cutoff_timestamp)
+            logger.info("   agent_id: %s, user_number: %s", normalized_agent, normalized_user)
             
-            last_24h_messages = []
-            for msg in messages_array:
-                msg_timestamp = msg.get("timestamp", "")
-                
-                # Check if message is within last 24 hours
-                if msg_timestamp >= cutoff_timestamp:
-                    # Ensure role field exists
-                    if "role" not in msg:
-                        msg["role"] = "user" if msg.get("direction") == "inbound" else "assistant"
-                    last_24h_messages.append(msg)
-            
-            # Sort by timestamp (oldest first)
-            last_24h_messages.sort(key=lambda x: x.get("timestamp", ""))
+            # Filter messages by timestamp (last 24 hours), oldest first - index range scan
+            # Only the fields the LLM history builder reads are decoded
+            cursor = collection.find(
+                {
+                    "agent_id": normalized_agent,
+                    "user_number": normalized_user,
+                    "timestamp": {"$gte": cutoff}
+                },
+                projection=_HISTORY_PROJECTION,
+                batch_size=_CURSOR_BATCH_SIZE
+            ).sort("timestamp", 1)
+            last_24h_messages = await cursor.to_list(length=None)
+            for msg in last_24h_messages:
+                msg["timestamp"] = _iso_timestamp(msg.get("timestamp"))
             
-            logger.info(f"📅 Found {len(last_24h_messages)} message(s) from last 24 hours")
+            logger.info("📅 Found %s message(s) from last 24 hours", len(last_24h_messages))
             
             return last_24h_messages
             
@@ -554,9 +895,7 @@ class MongoDBMessageStore:
     async def get_all_messages(self, agent_id: Optional[str] = None,
                               conversation_id: Optional[str] = None,
                               limit: int = 100) -> List[Dict[str, Any]]:
-        """Get all messages with optional filtering
-        Works with new structure: one document per agent_id + user_number combination
-        """
+        """Get all messages with optional filtering"""
         if not is_mongodb_available():
             return []
         
@@ -565,56 +904,124 @@ class MongoDBMessageStore:
             if collection is None:
                 return []
             
-            # Build query - get documents by agent_id (normalize if provided)
+            # Build query - filter messages by agent_id (normalize if provided)
             query = {}
             if agent_id:
                 query["agent_id"] = normalize_phone_number(agent_id)
-            
-            messages = []
-            
-            # Get all documents matching the query (one per agent_id + user_number)
-            cursor = collection.find(query)
-            async for doc in cursor:
-                agent_id_doc = doc.get("agent_id")
-                user_number_doc = doc.get("user_number")  # Get from document level
-                messages_array = doc.get("messages", [])
-                
-                # Filter by conversation_id if specified
-                if conversation_id:
-                    messages_array = [msg for msg in messages_array if msg.get("conversation_id") == conversation_id]
-                
-                # Add messages to result
-                for msg in messages_array:
-                    agent_number = msg.get("agent_number") or agent_id_doc
-                    
-                    messages.append({
-                        "id": msg.get("message_sid"),
-                        "message_sid": msg.get("message_sid"),
-                        "agent_number": agent_number,
-                        "user_number": user_number_doc,  # From document level
-                        "body": msg.get("body"),
-                        "agent_id": agent_id_doc,
-                        "conversation_id": msg.get("conversation_id"),
-                        "direction": msg.get("direction"),
-                        "status": msg.get("status"),
-                        "timestamp": msg.get("timestamp"),
-                        "role": msg.get("role") or ("user" if msg.get("direction") == "inbound" else "assistant"),
-                    })
-            
-            # Sort by timestamp (most recent first) and apply limit
-            messages.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            messages = messages[:limit]
-            
-            return messages
+            if conversation_id:
+                query["conversation_id"] = conversation_id
+            
+            # Sort (most recent first), limit and reshape in MongoDB
+            pipeline = [
+                {"$match": query},
+                {"$sort": {"timestamp": -1}},
+                {"$limit": limit},
+                {"$project": {
+                    "_id": 0,
+                    "id": "$message_sid",
+                    "message_sid": 1,
+                    "agent_number": {"$ifNull": ["$agent_number", "$agent_id"]},
+                    "user_number": 1,
+                    "body": 1,
+                    "agent_id": 1,
+                    "conversation_id": 1,
+                    "direction": 1,
+                    "status": 1,
+                    "timestamp": _iso_timestamp_expr("$timestamp"),
+                    "role": 1,
+                }}
+            ]
+            
+            return await collection.aggregate(pipeline).to_list(length=limit)
             
         except Exception as e:
             logger.error(f"Error getting messages: {e}")
             return []
     
-    async def get_conversations(self, agent_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get all conversations grouped by agent_id + user_number
-        Works with new structure: one document per agent_id + user_number combination
-        """
+    def _conversation_pipeline(self, query: Dict[str, Any], limit: int,
+                               include_messages: bool = True) -> List[Dict[str, Any]]:
+        """Aggregation that groups messages into one document per agent_id + user_number,
+        already shaped for the UI: { agent_id, user_number, conversation_id, timestamp,
+        latest_message, message_count, conversation: [{role, direction, text, timestamp}] }
+        Returns at most `limit` conversations, most recently active first.
+        With include_messages=False the conversation array is never built or shipped."""
+        group_stage = {
+            "_id": {"agent_id": "$agent_id", "user_number": "$user_number"},
+            "conversation": {"$push": {
+                # Infer missing role/direction (backward compatibility with old messages)
+                "role": {"$ifNull": ["$role", {"$cond": [
+                    {"$eq": ["$direction", "inbound"]}, "user", "assistant"
+                ]}]},
+                "direction": {"$ifNull": ["$direction", {"$cond": [
+                    {"$in": ["$role", ["user", "customer"]]}, "inbound", "outbound"
+                ]}]},
+                "text": {"$ifNull": ["$body", ""]},
+                "timestamp": _iso_timestamp_expr("$timestamp")
+            }},
+            # Every message is written with its conversation_id, so the latest one wins
+            "conversation_id": {"$last": "$conversation_id"},
+            "latest_timestamp": {"$last": "$timestamp"},
+            "latest_message": {"$last": "$body"},
+            "message_count": {"$sum": 1}
+        }
+        project_stage = {
+            "_id": 0,
+            "agent_id": "$_id.agent_id",
+            "user_number": "$_id.user_number",
+            "conversation_id": 1,
+            "timestamp": _iso_timestamp_expr("$latest_timestamp"),
+            "latest_message": {"$ifNull": ["$latest_message", ""]},
+            "message_count": 1,
+            "conversation": 1
+        }
+        if not include_messages:
+            del group_stage["conversation"]
+            del project_stage["conversation"]
+        
+        return [
+            {"$match": query},
+            # Walks agent_user_ts_idx in key order (no in-memory sort); $push keeps this
+            # order, so each conversation array arrives chronologically without re-sorting
+            {"$sort": {"agent_id": 1, "user_number": 1, "timestamp": 1}},
+            {"$group": group_stage},
+            # Top-N in the engine so only `limit` conversations are shipped
+            {"$sort": {"latest_timestamp": -1}},
+            {"$limit": limit},
+            {"$project": project_stage}
+        ]
+    
+    async def _list_conversations(self, collection, query: Dict[str, Any], limit: int,
+                                  include_messages: bool,
+                                  agents: Optional[Tuple[str, ...]]) -> List[Dict[str, Any]]:
+        """Run the conversation pipeline for `query` and project each group for the UI.
+        `agents` are the normalized agent_ids the query covers (None = all), used for caching."""
+        cache_key = _conversation_list_key(agents, limit, include_messages)
+        cached = _get_cached_conversation_list(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Group matching messages into one document per agent_id + user_number
+        cursor = collection.aggregate(
+            self._conversation_pipeline(query, limit, include_messages),
+            allowDiskUse=True,
+            batchSize=min(limit, _CURSOR_BATCH_SIZE)
+        )
+        # The pipeline already caps results at `limit`, so fetch them in one call
+        # and project synchronously instead of awaiting each document
+        docs = await cursor.to_list(length=limit)
+        conversations = []
+        for doc in docs:
+            conversation = _project_conversation(doc)
+            if conversation is not None:
+                conversations.append(conversation)
+        
+        _set_cached_conversation_list(cache_key, conversations)
+        return conversations
+    
+    async def get_conversations(self, agent_id: Optional[str] = None, limit: int = 100,
+                                include_messages: bool = True) -> List[Dict[str, Any]]:
+        """Get all conversations grouped by agent_id + user_number.
+        include_messages=False returns only the summary fields (latest message, count)."""
         if not is_mongodb_available():
             return []
         
@@ -625,89 +1032,12 @@ class MongoDBMessageStore:
             
             # Build query - get documents by agent_id (normalize if provided)
             query = {}
+            agents = None
             if agent_id:
                 query["agent_id"] = normalize_phone_number(agent_id)
+                agents = (query["agent_id"],)
             
-            # Get all documents matching the query (one per agent_id + user_number)
-            cursor = collection.find(query)
-            all_conversations = {}
-            
-            async for doc in cursor:
-                agent_id_doc = doc.get("agent_id")
-                user_number_doc = doc.get("user_number")
-                
-                if not agent_id_doc or not user_number_doc:
-                    continue
-                
-                messages_array = doc.get("messages", [])
-                if not messages_array:
-                    continue
-                
-                # Sort messages by timestamp
-                messages_array.sort(key=lambda x: x.get("timestamp", ""))
-                
-                # Get conversation_id from most recent message
-                conversation_id = None
-                for msg in reversed(messages_array):
-                    if msg.get("conversation_id"):
-                        conversation_id = msg.get("conversation_id")
-                        break
-                
-                if not conversation_id:
-                    conversation_id = str(uuid.uuid4())
-                
-                # Get latest message info
-                latest_message_obj = messages_array[-1] if messages_array else None
-                latest_timestamp = latest_message_obj.get("timestamp", "") if latest_message_obj else ""
-                latest_message = latest_message_obj.get("body", "") if latest_message_obj else ""
-                
-                # Build conversation array for UI
-                conversation_messages = []
-                for msg in messages_array:
-                    # Get or infer direction field (for backward compatibility with old messages)
-                    direction = msg.get("direction")
-                    if not direction:
-                        # Infer direction from role field if direction is missing
-                        role = msg.get("role")
-                        if role == "user" or role == "customer":
-                            direction = "inbound"
-                        else:
-                            direction = "outbound"
-                    
-                    # Determine role (with direction fallback)
-                    role = msg.get("role") or ("user" if direction == "inbound" else "assistant")
-                    
-                    conversation_messages.append({
-                        "role": role,
-                        "direction": direction,  # Always include direction for UI to use
-                        "text": msg.get("body", ""),
-                        "timestamp": msg.get("timestamp")
-                    })
-                
-                # Store conversation
-                # Use composite ID to ensure uniqueness: agent_id + user_number
-                unique_id = f"{agent_id_doc}_{user_number_doc}"
-                
-                if unique_id not in all_conversations:
-                    all_conversations[unique_id] = {
-                        "id": unique_id,
-                        "conversation_id": conversation_id,
-                        "phoneNumberId": agent_id_doc,
-                        "callerNumber": user_number_doc,
-                        "agentNumber": agent_id_doc,
-                        "status": "active",
-                        "timestamp": latest_timestamp,
-                        "latest_message": latest_message,
-                        "message_count": len(messages_array),
-                        "conversation": conversation_messages
-                    }
-            
-            # Convert to list and sort by latest timestamp
-            conversations = list(all_conversations.values())
-            conversations.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            
-            # Apply limit
-            conversations = conversations[:limit]
+            conversations = await self._list_conversations(collection, query, limit, include_messages, agents)
             
             logger.info(f"✅ Retrieved {len(conversations)} conversation(s) from get_conversations")
             if conversations:
@@ -716,15 +1046,14 @@ class MongoDBMessageStore:
             
         except Exception as e:
             logger.error(f"❌ Error getting conversations: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
             return []
     
     async def get_conversations_for_user(
         self, 
         user_phone_numbers: List[str],
         agent_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        include_messages: bool = True
     ) -> List[Dict[str, Any]]:
         """Get conversations filtered by user's phone numbers for multi-tenancy
         
@@ -732,6 +1061,7 @@ class MongoDBMessageStore:
             user_phone_numbers: List of phone numbers owned by the user
             agent_id: Optional filter for specific phone number (must be in user_phone_numbers)
             limit: Max conversations to return
+            include_messages: False to skip the per-conversation message array (listing views)
         
         Returns:
             List of conversations belonging to the user
@@ -745,101 +1075,24 @@ class MongoDBMessageStore:
                 return []
             
             # Normalize all user phone numbers
-            normalized_numbers = [normalize_phone_number(pn) for pn in user_phone_numbers]
+            normalized_numbers = list(map(normalize_phone_number, user_phone_numbers))
             
             # Build query - filter by user's phone numbers
             if agent_id:
                 # Single phone number filter (already validated as belonging to user)
                 query = {"agent_id": normalize_phone_number(agent_id)}
+                agents = (query["agent_id"],)
             else:
                 # Filter by all user's phone numbers
                 query = {"agent_id": {"$in": normalized_numbers}}
+                agents = tuple(sorted(set(normalized_numbers)))
             
-            # Get all documents matching the query
-            cursor = collection.find(query)
-            all_conversations = {}
-            
-            async for doc in cursor:
-                agent_id_doc = doc.get("agent_id")
-                user_number_doc = doc.get("user_number")
-                
-                if not agent_id_doc or not user_number_doc:
-                    continue
-                
-                messages_array = doc.get("messages", [])
-                if not messages_array:
-                    continue
-                
-                # Sort messages by timestamp
-                messages_array.sort(key=lambda x: x.get("timestamp", ""))
-                
-                # Get conversation_id from most recent message
-                conversation_id = None
-                for msg in reversed(messages_array):
-                    if msg.get("conversation_id"):
-                        conversation_id = msg.get("conversation_id")
-                        break
-                
-                if not conversation_id:
-                    conversation_id = str(uuid.uuid4())
-                
-                # Get latest message info
-                latest_message_obj = messages_array[-1] if messages_array else None
-                latest_timestamp = latest_message_obj.get("timestamp", "") if latest_message_obj else ""
-                latest_message = latest_message_obj.get("body", "") if latest_message_obj else ""
-                
-                # Build conversation array for UI
-                conversation_messages = []
-                for msg in messages_array:
-                    # Get or infer direction field
-                    direction = msg.get("direction")
-                    if not direction:
-                        role = msg.get("role")
-                        if role == "user" or role == "customer":
-                            direction = "inbound"
-                        else:
-                            direction = "outbound"
-                    
-                    # Determine role (with direction fallback)
-                    role = msg.get("role") or ("user" if direction == "inbound" else "assistant")
-                    
-                    conversation_messages.append({
-                        "role": role,
-                        "direction": direction,
-                        "text": msg.get("body", ""),
-                        "timestamp": msg.get("timestamp")
-                    })
-                
-                # Store conversation
-                unique_id = f"{agent_id_doc}_{user_number_doc}"
-                
-                if unique_id not in all_conversations:
-                    all_conversations[unique_id] = {
-                        "id": unique_id,
-                        "conversation_id": conversation_id,
-                        "phoneNumberId": agent_id_doc,
-                        "callerNumber": user_number_doc,
-                        "agentNumber": agent_id_doc,
-                        "status": "active",
-                        "timestamp": latest_timestamp,
-                        "latest_message": latest_message,
-                        "message_count": len(messages_array),
-                        "conversation": conversation_messages
-                    }
-            
-            # Convert to list and sort by latest timestamp
-            conversations = list(all_conversations.values())
-            conversations.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-            
-            # Apply limit
-            conversations = conversations[:limit]
+            conversations = await self._list_conversations(collection, query, limit, include_messages, agents)
             
             logger.info(f"✅ Retrieved {len(conversations)} conversation(s) for user (filtered by {len(normalized_numbers)} phone(s))")
             return conversations
             
         except Exception as e:
             logger.error(f"❌ Error getting conversations for user: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback:\n{traceback.format_exc()}")
             return []
 
@@ -5,14 +5,27 @@ Handles saving and loading registered phone numbers with Twilio credentials
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+from functools import lru_cache
+import asyncio
 import logging
+import re
+import time
+import uuid
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from .mongodb_db import get_mongo_db, is_mongodb_available
 
 logger = logging.getLogger(__name__)
 
+# Formatting characters stripped from phone numbers (spaces, dashes, parentheses, dots)
+_PHONE_STRIP_TABLE = str.maketrans("", "", " -().")
+
+@lru_cache(maxsize=8192)
 def normalize_phone_number(phone_number: str) -> str:
     """
     Normalize phone number to E.164 format (e.g., "+15551234567")
+    Results are memoized - the same handful of numbers is normalized on every request.
 
     Args:
         phone_number: Phone number in any format (e.g., "+1 555 123 4567", "555-123-4567", etc.)
@@ -24,7 +37,7 @@ def normalize_phone_number(phone_number: str) -> str:
         return ""
 
     # Remove all formatting characters (spaces, dashes, parentheses, dots)
-    normalized = phone_number.replace(" ", "").replace("-", "").replace("(", "").replace(")", "").replace(".", "")
+    normalized = phone_number.translate(_PHONE_STRIP_TABLE)
 
     # If it already starts with +, it's already in E.164 format
     if normalized.startswith("+"):
@@ -39,9 +52,57 @@ def normalize_phone_number(phone_number: str) -> str:
     # Note: For international numbers, users should provide them in + format
     return "+1" + normalized
 
+
+# Stored phoneNumbers that normalize_phone_number would still change (registrations
+# written before numbers were normalized): anything not "+" followed by no formatting characters
+_UNNORMALIZED_PHONE_QUERY = {
+    "phoneNumber": {"$type": "string", "$ne": "", "$not": re.compile(r"^\+[^ ().-]*$")}
+}
+# Updates per bulk_write when normalizing stored numbers
+_NORMALIZE_BATCH_SIZE = 1000
+
+
+# In-process cache for get_phone_by_number - every inbound call/SMS webhook looks up
+# the same few numbers. Stores are instantiated per request, so the cache lives at
+# module level; any registration change clears it.
+_PHONE_LOOKUP_TTL_SECONDS = 10
+_PHONE_LOOKUP_CACHE_SIZE = 1024
+_phone_lookup_cache: Dict[tuple, tuple] = {}
+
+
+def _get_cached_phone(key: tuple) -> Optional[Dict[str, Any]]:
+    """Return a copy of the cached phone, or None if missing or expired"""
+    entry = _phone_lookup_cache.get(key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[1] > _PHONE_LOOKUP_TTL_SECONDS:
+        _phone_lookup_cache.pop(key, None)
+        return None
+    return dict(entry[0])
+
+
+def _set_cached_phone(key: tuple, phone: Dict[str, Any]):
+    """Cache a phone lookup, evicting the oldest entry when full"""
+    _phone_lookup_cache.pop(key, None)
+    if len(_phone_lookup_cache) >= _PHONE_LOOKUP_CACHE_SIZE:
+        _phone_lookup_cache.pop(next(iter(_phone_lookup_cache)))
+    _phone_lookup_cache[key] = (dict(phone), time.monotonic())
+
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-run
+_background_tasks: set = set()
+
+
 class MongoDBPhoneStore:
     """Store and retrieve registered phone numbers from MongoDB"""
     
+    # Indexes only need to be created once per process
+    _indexes_ensured = False
+    # Resolved collection, shared across instances (handlers create a store per
+    # request); re-resolved if MongoDB is re-initialized with a new database
+    _collection = None
+    _collection_db = None
+    
     def __init__(self):
         self.collection_name = "registered_phone_numbers"
     
@@ -51,7 +112,110 @@ class MongoDBPhoneStore:
         if db is None:
             logger.warning("MongoDB is not available, cannot get collection.")
             return None
-        return db[self.collection_name]
+        if MongoDBPhoneStore._collection_db is not db:
+            MongoDBPhoneStore._collection = db[self.collection_name]
+            MongoDBPhoneStore._collection_db = db
+        return MongoDBPhoneStore._collection
+    
+    async def ensure_indexes(self) -> bool:
+        """Create the indexes used by registration and lookup (idempotent)"""
+        if MongoDBPhoneStore._indexes_ensured:
+            return True
+        if not is_mongodb_available():
+            return False
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            # Queries match isDeleted == False (index-friendly, unlike $ne: True), so
+            # backfill docs written before the flag existed
+            await collection.update_many(
+                {"isDeleted": {"$nin": [True, False]}},
+                {"$set": {"isDeleted": False}}
+            )
+            
+            # One live registration per user + type + number; soft-deleted docs are exempt
+            await collection.create_index(
+                [("userId", 1), ("type", 1), ("phoneNumber", 1)],
+                name="uniq_user_type_phone",
+                unique=True,
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            # Lookup/listing indexes only cover live docs (partial on isDeleted=False),
+            # so soft-deleted registrations don't grow them
+            # Webhook lookups by number (get_phone_by_number), optionally by type/user
+            await collection.create_index(
+                [("phoneNumber", 1), ("type", 1), ("userId", 1)],
+                name="live_phone_type_user_idx",
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            # list_phones: tenant filter + newest-first sort walked in index order
+            await collection.create_index(
+                [("userId", 1), ("isActive", 1), ("type", 1), ("created_at", -1)],
+                name="live_user_list_idx",
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            # Superseded by the partial indexes above
+            existing = await collection.index_information()
+            for name in ("phone_type_user_idx", "user_list_idx"):
+                if name in existing:
+                    await collection.drop_index(name)
+            MongoDBPhoneStore._indexes_ensured = True
+            logger.info(f"✅ Indexes ensured on '{self.collection_name}' collection")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not ensure indexes on '{self.collection_name}': {e}")
+            return False
+    
+    async def normalize_stored_numbers(self) -> bool:
+        """Rewrite phoneNumbers stored in a legacy (un-normalized) format (idempotent).
+        Webhook lookups match the normalized number exactly, so such registrations
+        would otherwise never be found.
+        
+        Returns:
+            True if nothing is left to normalize (or MongoDB is not configured), False on failure
+        """
+        if not is_mongodb_available():
+            return True
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            updated = 0
+            ops = []
+            cursor = collection.find(
+                _UNNORMALIZED_PHONE_QUERY, projection={"phoneNumber": 1}
+            ).batch_size(_NORMALIZE_BATCH_SIZE)
+            async for doc in cursor:
+                ops.append(UpdateOne(
+                    {"_id": doc["_id"]},
+                    {"$set": {"phoneNumber": normalize_phone_number(doc["phoneNumber"])}}
+                ))
+                if len(ops) >= _NORMALIZE_BATCH_SIZE:
+                    result = await collection.bulk_write(ops, ordered=False)
+                    updated += result.modified_count
+                    ops = []
+            
+            if ops:
+                result = await collection.bulk_write(ops, ordered=False)
+                updated += result.modified_count
+            
+            if updated:
+                _phone_lookup_cache.clear()
+                logger.warning(f"📞 Normalized {updated} legacy phone number(s) in '{self.collection_name}'")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error normalizing stored phone numbers in '{self.collection_name}': {e}", exc_info=True)
+            return False
     
     async def register_phone(self, phone_data: Dict[str, Any], user_id: str) -> Optional[str]:
         """Register a new phone number with Twilio credentials
@@ -93,98 +257,77 @@ class MongoDBPhoneStore:
             # Get the type from phone_data (default to 'calls' for backward compatibility)
             registration_type = phone_data.get("type", "calls")
             
-            # Check if phone number already exists FOR THIS SPECIFIC TYPE AND USER
-            # This allows the same phone number to be registered for both 'calls' and 'messages' separately
-            # But each user can only register a phone number once per type
-            # Exclude deleted phones from the check
-            try:
-                existing = await collection.find_one({
-                    "phoneNumber": normalized_phone,
-                    "type": registration_type,  # Check within the same type only
-                    "userId": user_id,  # Check within the same user
-                    "isDeleted": {"$ne": True}
-                })
-                if not existing:
-                    # Also check if any phone with different format exists (normalize all and compare)
-                    # Exclude deleted phones and check within same type and user
-                    async for doc in collection.find({
-                        "type": registration_type,
-                        "userId": user_id,
-                        "isDeleted": {"$ne": True}
-                    }):
-                        stored_phone = doc.get("phoneNumber", "")
-                        if normalize_phone_number(stored_phone) == normalized_phone:
-                            existing = doc
-                            break
-            except Exception as e:
-                logger.error(f"Error checking for existing phone: {e}", exc_info=True)
-                raise ValueError(f"Error checking if phone number exists: {str(e)}")
-            
-            if existing:
-                existing_phone_id = str(existing.get("_id"))
-                existing_is_deleted = existing.get("isDeleted", False)
-                existing_is_active = existing.get("isActive", True)
-                existing_type = existing.get("type", "calls")
-                
-                # If phone exists for this type and is not deleted, raise error (duplicate validation)
-                if not existing_is_deleted:
-                    error_msg = f"Phone number {normalized_phone} is already registered for type '{registration_type}'. Please delete the existing registration first or use a different phone number."
-                    logger.warning(f"❌ Duplicate phone number detected: {normalized_phone} (original: {phone_number}) already registered for type '{registration_type}' (ID: {existing_phone_id}, Active: {existing_is_active})")
-                    raise ValueError(error_msg)
-                
-                # If phone exists but is deleted, allow re-registration (restore it)
-                logger.info(f"Phone number {normalized_phone} for type '{registration_type}' was previously deleted. Restoring registration...")
-                # Update the existing record instead of creating new one
-                # Only update the fields we want to change, preserve existing _id
-                update_data = {
-                    "phoneNumber": normalized_phone,
-                    "originalPhoneNumber": phone_number,
-                    "provider": phone_data.get("provider", "twilio"),  # Store provider
-                    "twilioAccountSid": phone_data.get("twilioAccountSid"),
-                    "twilioAuthToken": phone_data.get("twilioAuthToken"),
-                    "twilioAccountName": phone_data.get("twilioAccountName", "Twilio 0"),
-                    "webhookUrl": phone_data.get("webhookUrl"),
-                    "statusCallbackUrl": phone_data.get("statusCallbackUrl"),
-                    "smsWebhookUrl": phone_data.get("smsWebhookUrl"),  # Add SMS webhook support
-                    "userId": user_id,  # Store user ID
-                    "type": registration_type,  # Ensure type is set
-                    "isDeleted": False,
-                    "isActive": True,
-                    "updated_at": datetime.utcnow().isoformat()
-                }
-                await collection.update_one(
-                    {"_id": existing.get("_id")},
-                    {"$set": update_data}
-                )
-                logger.info(f"✅ Restored previously deleted phone number {normalized_phone} for type '{registration_type}' (ID: {existing_phone_id})")
-                return existing_phone_id
-            
             # Store normalized phone number
             phone_data["phoneNumber"] = normalized_phone
-            phone_data["originalPhoneNumber"] = phone_number  # Keep original for reference
             
-            # Add timestamps and user ID
-            phone_data["created_at"] = datetime.utcnow().isoformat()
-            phone_data["updated_at"] = datetime.utcnow().isoformat()
+            # Add timestamps and user ID (one clock read so created_at == updated_at)
+            now = datetime.utcnow().isoformat()
+            phone_data["updated_at"] = now
             phone_data["isActive"] = True
             phone_data["userId"] = user_id  # Store user ID for multi-tenancy
-            
-            # NEW: Add isDeleted, uuid, and type
             phone_data["isDeleted"] = False
-            import uuid
-            phone_data["uuid"] = str(uuid.uuid4())
             
             # Set type (default to 'calls' if not provided for backward compatibility)
             if "type" not in phone_data:
                 phone_data["type"] = "calls"
             
-            # Insert phone registration
-            result = await collection.insert_one(phone_data)
+            error_msg = f"Phone number {normalized_phone} is already registered for type '{registration_type}'. Please delete the existing registration first or use a different phone number."
+            
+            # uniq_user_type_phone is the duplicate guard. Until it exists (e.g. it could not be
+            # built over legacy duplicates), check for a live registration before writing.
+            if not MongoDBPhoneStore._indexes_ensured:
+                existing = await collection.find_one(
+                    {
+                        "userId": user_id,
+                        "type": phone_data["type"],
+                        "phoneNumber": normalized_phone,
+                        "isDeleted": False
+                    },
+                    projection={"_id": 1}
+                )
+                if existing:
+                    logger.warning(f"❌ Duplicate phone number detected: {normalized_phone} (original: {phone_number}) already registered for type '{registration_type}' (ID: {existing['_id']})")
+                    raise ValueError(error_msg)
             
+            # Each user can register a phone number once per type (the same number may be
+            # registered for both 'calls' and 'messages'); uniq_user_type_phone rejects a
+            # second live registration on either write below.
+            phone_data["created_at"] = now
+            phone_data["uuid"] = str(uuid.uuid4())
+            try:
+                # A previously deleted registration for this user + type + number is restored
+                # by replacing it wholesale: only its _id survives (prompts and agents reference
+                # it as phoneNumberId), no stale fields from the old registration are kept.
+                # With several deleted copies, the most recently deleted one is restored.
+                restored = await collection.find_one_and_replace(
+                    {
+                        "userId": user_id,
+                        "type": phone_data["type"],
+                        "phoneNumber": normalized_phone,
+                        "isDeleted": True
+                    },
+                    phone_data,
+                    projection={"_id": 1},
+                    sort=[("updated_at", -1), ("_id", -1)]
+                )
+                if restored is None:
+                    result = await collection.insert_one(phone_data)
+                _phone_lookup_cache.clear()
+            except DuplicateKeyError:
+                logger.warning(f"❌ Duplicate phone number detected: {normalized_phone} (original: {phone_number}) already registered for type '{registration_type}'")
+                raise ValueError(error_msg)
+            
+            if restored is not None:
+                phone_id = str(restored["_id"])
+                logger.info(f"✅ Restored previously deleted phone number {normalized_phone} for type '{registration_type}' (ID: {phone_id})")
+                logger.info("   Agents deactivated when this number was deleted stay inactive until re-enabled")
+                return phone_id
+            
+            phone_id = str(result.inserted_id)
             logger.info(f"✅ Successfully registered phone number {normalized_phone} (original: {phone_number}) in MongoDB")
-            logger.info(f"   Phone ID: {result.inserted_id}")
+            logger.info(f"   Phone ID: {phone_id}")
             logger.info(f"   Type: {phone_data.get('type')}")
-            return str(result.inserted_id)
+            return phone_id
             
         except ValueError:
             # Re-raise ValueError (duplicate phone, validation errors) to be handled by API endpoint
@@ -205,17 +348,15 @@ class MongoDBPhoneStore:
             if collection is None:
                 return None
             
-            from bson import ObjectId
             query = {"_id": ObjectId(phone_id)}
             if user_id:
                 query["userId"] = user_id  # Filter by user if provided
             phone = await collection.find_one(query)
             
             if phone:
-                phone_dict = dict(phone)
-                phone_dict["id"] = str(phone_dict["_id"])
-                del phone_dict["_id"]
-                return phone_dict
+                # Motor returns a fresh dict per document - rename _id in place
+                phone["id"] = str(phone.pop("_id"))
+                return phone
             return None
             
         except Exception as e:
@@ -247,10 +388,15 @@ class MongoDBPhoneStore:
             log_suffix = f" (type={type_filter})" if type_filter else ""
             logger.debug(f"Looking up phone number: '{phone_number}' -> normalized: '{normalized_phone}'{log_suffix}")
             
+            cache_key = (normalized_phone, type_filter, user_id)
+            cached = _get_cached_phone(cache_key)
+            if cached is not None:
+                return cached
+            
             # Build query - exclude deleted phones
             query = {
                 "phoneNumber": normalized_phone,
-                "isDeleted": {"$ne": True}
+                "isDeleted": False
             }
             
             # Add type filter if provided
@@ -261,32 +407,16 @@ class MongoDBPhoneStore:
             if user_id:
                 query["userId"] = user_id
             
-            # First try exact match with normalized number
+            # Exact match on the normalized number (live_phone_type_user_idx) - stored numbers
+            # are normalized at startup (normalize_stored_numbers), so a miss means the
+            # number isn't registered
             phone = await collection.find_one(query)
             
             if phone:
-                phone_dict = dict(phone)
-                phone_dict["id"] = str(phone_dict["_id"])
-                del phone_dict["_id"]
+                phone["id"] = str(phone.pop("_id"))
                 logger.debug(f"✅ Found phone by normalized number: {normalized_phone}{log_suffix}")
-                return phone_dict
-            
-            # If not found, try to find by normalizing all stored phones
-            # This handles cases where phone was stored in a different format
-            search_query = {"isDeleted": {"$ne": True}}
-            if type_filter:
-                search_query["type"] = type_filter
-            if user_id:
-                search_query["userId"] = user_id
-            
-            async for doc in collection.find(search_query):
-                stored_phone = doc.get("phoneNumber", "")
-                if normalize_phone_number(stored_phone) == normalized_phone:
-                    phone_dict = dict(doc)
-                    phone_dict["id"] = str(phone_dict["_id"])
-                    del phone_dict["_id"]
-                    logger.info(f"✅ Found phone by normalized comparison: stored '{stored_phone}' matches '{normalized_phone}'{log_suffix}")
-                    return phone_dict
+                _set_cached_phone(cache_key, phone)
+                return phone
             
             logger.warning(f"❌ Phone number not found: '{phone_number}' (normalized: '{normalized_phone}'){log_suffix}")
             return None
@@ -295,13 +425,16 @@ class MongoDBPhoneStore:
             logger.error(f"Error getting phone by number {phone_number}: {e}")
             return None
     
-    async def list_phones(self, active_only: bool = True, type_filter: Optional[str] = None, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def list_phones(self, active_only: bool = True, type_filter: Optional[str] = None, user_id: Optional[str] = None,
+                          skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """List all registered phone numbers
         
         Args:
             active_only: If True, only return active phones
             type_filter: Optional filter for 'calls' or 'messages'
             user_id: Optional user ID filter for multi-tenancy
+            skip: Number of phones to skip (pagination)
+            limit: Optional max number of phones to return
         
         Returns:
             List of phone dictionaries
@@ -317,7 +450,7 @@ class MongoDBPhoneStore:
                 return []
             
             # Build query - always exclude deleted phones
-            query = {"isDeleted": {"$ne": True}}  # Exclude soft-deleted phones
+            query = {"isDeleted": False}  # Exclude soft-deleted phones
             
             if active_only:
                 query["isActive"] = True
@@ -332,19 +465,24 @@ class MongoDBPhoneStore:
             
             logger.debug(f"Querying phones with query: {query}, active_only={active_only}, type={type_filter}, user_id={user_id}")
             
-            phones = []
-            total_count = 0
-            async for doc in collection.find(query).sort("created_at", -1):
-                total_count += 1
-                phone_dict = dict(doc)
-                phone_dict["id"] = str(phone_dict["_id"])
-                del phone_dict["_id"]
-                # Don't expose sensitive auth token in list
-                if "twilioAuthToken" in phone_dict:
-                    phone_dict["twilioAuthToken"] = "***hidden***"
-                phones.append(phone_dict)
-            
-            logger.debug(f"📞 Found {len(phones)} phone(s) in collection '{self.collection_name}' (total scanned: {total_count})")
+            pipeline = [
+                {"$match": query},
+                {"$sort": {"created_at": -1}},
+            ]
+            if skip:
+                pipeline.append({"$skip": skip})
+            if limit:
+                pipeline.append({"$limit": limit})
+            # Don't expose sensitive auth token in list - masked server-side so it never leaves MongoDB
+            pipeline.append({"$set": {"twilioAuthToken": {"$cond": [
+                {"$ifNull": ["$twilioAuthToken", False]}, "***hidden***", "$$REMOVE"
+            ]}}})
+            
+            phones = await collection.aggregate(pipeline).to_list(length=limit)
+            for phone_dict in phones:
+                phone_dict["id"] = str(phone_dict.pop("_id"))
+            
+            logger.debug(f"📞 Found {len(phones)} phone(s) in collection '{self.collection_name}'")
             if phones:
                 for phone in phones:
                     logger.debug(f"   - {phone.get('phoneNumber', 'N/A')} (isActive: {phone.get('isActive', 'not set')}, type: {phone.get('type', 'N/A')})")
@@ -366,7 +504,6 @@ class MongoDBPhoneStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             result = await collection.update_one(
@@ -375,6 +512,7 @@ class MongoDBPhoneStore:
             )
             
             if result.modified_count > 0:
+                _phone_lookup_cache.clear()
                 logger.info(f"✅ Updated phone {phone_id}")
                 return True
             else:
@@ -396,46 +534,35 @@ class MongoDBPhoneStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
-            
-            # First, get the phone number before deleting (to deactivate associated agents)
-            query = {"_id": ObjectId(phone_id)}
+            # Soft delete and fetch the phone number (to deactivate associated agents)
+            # in one round trip instead of find_one followed by update_one
+            query = {"_id": ObjectId(phone_id), "isDeleted": False}
             if user_id:
                 query["userId"] = user_id  # Only allow deletion if user owns the phone
-            phone_doc = await collection.find_one(query)
-            if not phone_doc:
-                logger.warning(f"No phone found with ID {phone_id}")
-                return False
-            
-            phone_number = phone_doc.get("phoneNumber")
-            normalized_phone = normalize_phone_number(phone_number) if phone_number else None
-            
-            # Soft delete: set isDeleted to True instead of actually deleting
-            result = await collection.update_one(
-                {"_id": ObjectId(phone_id)},
+            phone_doc = await collection.find_one_and_update(
+                query,
                 {"$set": {
                     "isDeleted": True,
                     "isActive": False,  # Also deactivate when deleting
                     "updated_at": datetime.utcnow().isoformat()
-                }}
+                }},
+                projection={"phoneNumber": 1},
+                return_document=ReturnDocument.BEFORE,
             )
             
-            if result.modified_count > 0:
+            if phone_doc:
+                phone_number = phone_doc.get("phoneNumber")
+                normalized_phone = normalize_phone_number(phone_number) if phone_number else None
+                
+                _phone_lookup_cache.clear()
                 logger.info(f"✅ Soft deleted phone {phone_id} in MongoDB (set isDeleted=True)")
                 
-                # Deactivate all agents associated with this phone number
+                # Deactivate all agents associated with this phone number in the background -
+                # the deletion doesn't depend on it, so the caller doesn't wait for it
                 if normalized_phone:
-                    try:
-                        from databases.mongodb_agent_store import MongoDBAgentStore
-                        agent_store = MongoDBAgentStore()
-                        deactivated_count = await agent_store.deactivate_agents_by_phone(normalized_phone)
-                        if deactivated_count > 0:
-                            logger.info(f"✅ Deactivated {deactivated_count} agent(s) associated with phone number {normalized_phone}")
-                        else:
-                            logger.debug(f"No active agents found for phone number {normalized_phone}")
-                    except Exception as e:
-                        logger.error(f"Error deactivating agents for phone {normalized_phone}: {e}", exc_info=True)
-                        # Don't fail phone deletion if agent deactivation fails
+                    task = asyncio.create_task(self._cascade_deactivate_agents(normalized_phone))
+                    _background_tasks.add(task)
+                    task.add_done_callback(_background_tasks.discard)
                 
                 return True
             else:
@@ -445,4 +572,17 @@ class MongoDBPhoneStore:
         except Exception as e:
             logger.error(f"Error deleting phone {phone_id}: {e}", exc_info=True)
             return False
-
+    
+    async def _cascade_deactivate_agents(self, normalized_phone: str):
+        """Deactivate all agents associated with a deleted phone number"""
+        try:
+            from databases.mongodb_agent_store import MongoDBAgentStore
+            agent_store = MongoDBAgentStore()
+            deactivated_count = await agent_store.deactivate_agents_by_phone(normalized_phone)
+            if deactivated_count > 0:
+                logger.info(f"✅ Deactivated {deactivated_count} agent(s) associated with phone number {normalized_phone}")
+            else:
+                logger.debug(f"No active agents found for phone number {normalized_phone}")
+        except Exception as e:
+            # Don't fail phone deletion if agent deactivation fails
+            logger.error(f"Error deactivating agents for phone {normalized_phone}: {e}", exc_info=True)
@@ -6,6 +6,7 @@ Handles saving and loading prompts for outgoing calls
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
+from bson import ObjectId
 from .mongodb_db import get_mongo_db, is_mongodb_available
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,13 @@ logger = logging.getLogger(__name__)
 class MongoDBPromptStore:
     """Store and retrieve prompts from MongoDB"""
     
+    # Indexes only need to be created once per process
+    _indexes_ensured = False
+    # Resolved collection, shared across instances (handlers create a store per
+    # request); re-resolved if MongoDB is re-initialized with a new database
+    _collection = None
+    _collection_db = None
+    
     def __init__(self):
         self.collection_name = "prompts"
     
@@ -22,7 +30,48 @@ class MongoDBPromptStore:
         if db is None:
             logger.warning("MongoDB is not available, cannot get collection.")
             return None
-        return db[self.collection_name]
+        if MongoDBPromptStore._collection_db is not db:
+            MongoDBPromptStore._collection = db[self.collection_name]
+            MongoDBPromptStore._collection_db = db
+        return MongoDBPromptStore._collection
+    
+    async def ensure_indexes(self) -> bool:
+        """Create the indexes used by prompt listings (idempotent)"""
+        if MongoDBPromptStore._indexes_ensured:
+            return True
+        if not is_mongodb_available():
+            return False
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            # Queries match isDeleted == False (index-friendly, unlike $ne: True), so
+            # backfill docs written before the flag existed
+            await collection.update_many(
+                {"isDeleted": {"$nin": [True, False]}},
+                {"$set": {"isDeleted": False}}
+            )
+            
+            # list_prompts: tenant/phone filter + newest-first sort walked in index order.
+            # Partial on isDeleted=False so soft-deleted prompts aren't indexed
+            await collection.create_index(
+                [("userId", 1), ("phoneNumberId", 1), ("created_at", -1)],
+                name="live_user_phone_list_idx",
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            # Superseded by the partial index above
+            if "user_phone_list_idx" in await collection.index_information():
+                await collection.drop_index("user_phone_list_idx")
+            MongoDBPromptStore._indexes_ensured = True
+            logger.info(f"✅ Indexes ensured on '{self.collection_name}' collection")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not ensure indexes on '{self.collection_name}': {e}")
+            return False
     
     async def create_prompt(self, prompt_data: Dict[str, Any], user_id: str) -> Optional[str]:
         """Create a new prompt
@@ -57,9 +106,10 @@ class MongoDBPromptStore:
                 raise ValueError("Prompt content is required")
             # phoneNumberId is now optional for general prompts
             
-            # Add timestamps, metadata, and user ID
-            prompt_data["created_at"] = datetime.utcnow().isoformat()
-            prompt_data["updated_at"] = datetime.utcnow().isoformat()
+            # Add timestamps, metadata, and user ID (one clock read so created_at == updated_at)
+            now = datetime.utcnow().isoformat()
+            prompt_data["created_at"] = now
+            prompt_data["updated_at"] = now
             prompt_data["isDeleted"] = False
             prompt_data["userId"] = user_id  # Store user ID for multi-tenancy
             
@@ -85,20 +135,18 @@ class MongoDBPromptStore:
             if collection is None:
                 return None
             
-            from bson import ObjectId
             query = {
                 "_id": ObjectId(prompt_id),
-                "isDeleted": {"$ne": True}
+                "isDeleted": False
             }
             if user_id:
                 query["userId"] = user_id
             prompt = await collection.find_one(query)
             
             if prompt:
-                prompt_dict = dict(prompt)
-                prompt_dict["id"] = str(prompt_dict["_id"])
-                del prompt_dict["_id"]
-                return prompt_dict
+                # Motor returns a fresh dict per document - rename _id in place
+                prompt["id"] = str(prompt.pop("_id"))
+                return prompt
             return None
             
         except Exception as e:
@@ -126,7 +174,7 @@ class MongoDBPromptStore:
                 return []
             
             # Build query - always exclude deleted prompts
-            query = {"isDeleted": {"$ne": True}}
+            query = {"isDeleted": False}
             if phone_number_id:
                 query["phoneNumberId"] = phone_number_id
             if user_id:
@@ -134,12 +182,9 @@ class MongoDBPromptStore:
             
             logger.debug(f"Querying prompts with query: {query}")
             
-            prompts = []
-            async for doc in collection.find(query).sort("created_at", -1):
-                prompt_dict = dict(doc)
-                prompt_dict["id"] = str(prompt_dict["_id"])
-                del prompt_dict["_id"]
-                prompts.append(prompt_dict)
+            prompts = await collection.find(query).sort("created_at", -1).to_list(length=None)
+            for prompt in prompts:
+                prompt["id"] = str(prompt.pop("_id"))
             
             logger.info(f"📝 Found {len(prompts)} prompt(s) in collection '{self.collection_name}'")
             
@@ -160,7 +205,6 @@ class MongoDBPromptStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             result = await collection.update_one(
@@ -195,8 +239,6 @@ class MongoDBPromptStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
-            
             # Soft delete: set isDeleted to True
             delete_query = {"_id": ObjectId(prompt_id)}
             if user_id:
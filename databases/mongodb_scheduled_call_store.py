@@ -6,13 +6,83 @@ Handles saving and loading scheduled outgoing calls
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import logging
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import OperationFailure, WriteError
 from .mongodb_db import get_mongo_db, is_mongodb_available
 
 logger = logging.getLogger(__name__)
 
+# Documents per getMore when draining scheduled call cursors
+_CURSOR_BATCH_SIZE = 500
+
+# Listings leave out the (potentially large) prompt copy; get_scheduled_call returns it
+_LIST_PROJECTION = {"promptContent": 0}
+
+
+# Required fields for new scheduled calls, enforced by the collection validator so
+# invalid inserts are rejected by the insert itself. "moderate" validation leaves
+# updates to pre-existing documents alone.
+_SCHEDULED_CALL_SCHEMA = {
+    "bsonType": "object",
+    "required": ["callType", "fromPhoneNumberId", "toPhoneNumbers", "scheduledDateTime"],
+    "properties": {
+        "callType": {"enum": ["ai", "normal"]},
+        "fromPhoneNumberId": {"bsonType": "string", "minLength": 1},
+        "toPhoneNumbers": {"bsonType": "array", "minItems": 1},
+        "scheduledDateTime": {"bsonType": "string", "minLength": 1},
+    },
+    # AI calls need a prompt: a promptId, or the prompt text the API fills in
+    "anyOf": [
+        {"properties": {"callType": {"enum": ["normal"]}}},
+        {"required": ["promptId"]},
+        {"required": ["prompt"]},
+    ],
+}
+
+
+def _validation_error(call_data: Dict[str, Any]) -> Optional[str]:
+    """Python mirror of _SCHEDULED_CALL_SCHEMA, used while the validator is not attached.
+    Returns a description of the first problem, or None if the call is valid."""
+    if call_data.get("callType") not in ("ai", "normal"):
+        return "Call type must be 'ai' or 'normal'"
+    if not call_data.get("fromPhoneNumberId"):
+        return "From phone number ID is required"
+    if not call_data.get("toPhoneNumbers") or not isinstance(call_data.get("toPhoneNumbers"), list):
+        return "To phone numbers list is required"
+    if not call_data.get("scheduledDateTime"):
+        return "Scheduled date/time is required"
+    if call_data["callType"] == "ai" and "promptId" not in call_data and "prompt" not in call_data:
+        return "A prompt (promptId or prompt) is required for AI calls"
+    return None
+
+
+def _to_object_id(call_id: str) -> Optional[ObjectId]:
+    """Parse a scheduled call ID, returning None for malformed IDs"""
+    try:
+        return ObjectId(call_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _call_from_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Expose _id as a string id; Motor returns a fresh dict per document, so rename in place"""
+    doc["id"] = str(doc.pop("_id"))
+    return doc
+
+
 class MongoDBScheduledCallStore:
     """Store and retrieve scheduled calls from MongoDB"""
     
+    # Indexes only need to be created once per process
+    _indexes_ensured = False
+    # Whether the $jsonSchema validator is attached; until it is, inserts are checked in Python
+    _validator_attached = False
+    # Resolved collection, shared across instances (handlers create a store per
+    # request); re-resolved if MongoDB is re-initialized with a new database
+    _collection = None
+    _collection_db = None
+    
     def __init__(self):
         self.collection_name = "scheduled_calls"
     
@@ -22,7 +92,86 @@ class MongoDBScheduledCallStore:
         if db is None:
             logger.warning("MongoDB is not available, cannot get collection.")
             return None
-        return db[self.collection_name]
+        if MongoDBScheduledCallStore._collection_db is not db:
+            MongoDBScheduledCallStore._collection = db[self.collection_name]
+            MongoDBScheduledCallStore._collection_db = db
+        return MongoDBScheduledCallStore._collection
+    
+    async def ensure_indexes(self) -> bool:
+        """Set up the collection validator and the indexes used by listings and the worker (idempotent)"""
+        if MongoDBScheduledCallStore._indexes_ensured:
+            return True
+        if not is_mongodb_available():
+            return False
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            try:
+                await self._ensure_validator(collection)
+                MongoDBScheduledCallStore._validator_attached = True
+            except Exception as e:
+                # Indexes are still worth creating if the user lacks collMod rights;
+                # inserts fall back to _validation_error
+                logger.error(f"❌ Could not set validator on '{self.collection_name}', validating scheduled calls in Python instead: {e}")
+            
+            # Queries match isDeleted == False (index-friendly, unlike $ne: True), so
+            # backfill docs written before the flag existed
+            await collection.update_many(
+                {"isDeleted": {"$nin": [True, False]}},
+                {"$set": {"isDeleted": False}}
+            )
+            
+            # All indexes are partial and end with scheduledDateTime so the sort is
+            # read from the index
+            # get_pending_calls: only calls still waiting to run are indexed, so the
+            # worker's poll stays small as completed calls accumulate
+            await collection.create_index(
+                [("scheduledDateTime", 1)],
+                name="pending_calls_idx",
+                partialFilterExpression={"status": "scheduled", "isDeleted": False},
+                background=True
+            )
+            # list_scheduled_calls: tenant filter, optionally narrowed to one phone number
+            await collection.create_index(
+                [("userId", 1), ("scheduledDateTime", 1)],
+                name="live_user_schedule_idx",
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            await collection.create_index(
+                [("userId", 1), ("fromPhoneNumberId", 1), ("scheduledDateTime", 1)],
+                name="live_user_phone_schedule_idx",
+                partialFilterExpression={"isDeleted": False},
+                background=True
+            )
+            # Superseded by pending_calls_idx
+            if "live_status_schedule_idx" in await collection.index_information():
+                await collection.drop_index("live_status_schedule_idx")
+            MongoDBScheduledCallStore._indexes_ensured = True
+            logger.info(f"✅ Indexes ensured on '{self.collection_name}' collection")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not ensure indexes on '{self.collection_name}': {e}")
+            return False
+    
+    async def _ensure_validator(self, collection):
+        """Attach the $jsonSchema validator, creating the collection if needed"""
+        db = collection.database
+        options = {
+            "validator": {"$jsonSchema": _SCHEDULED_CALL_SCHEMA},
+            "validationLevel": "moderate",
+            "validationAction": "error",
+        }
+        try:
+            await db.command({"collMod": self.collection_name, **options})
+        except OperationFailure as e:
+            if e.code != 26:  # NamespaceNotFound
+                raise
+            await db.create_collection(self.collection_name, **options)
     
     async def create_scheduled_call(self, call_data: Dict[str, Any], user_id: str) -> Optional[str]:
         """Create a new scheduled call
@@ -51,25 +200,18 @@ class MongoDBScheduledCallStore:
                 logger.error("MongoDB collection is None, cannot create scheduled call")
                 return None
             
-            # Validate required fields
-            if not call_data.get("callType"):
-                raise ValueError("Call type is required (ai or normal)")
-            if call_data.get("callType") not in ["ai", "normal"]:
-                raise ValueError("Call type must be 'ai' or 'normal'")
-            if not call_data.get("fromPhoneNumberId"):
-                raise ValueError("From phone number ID is required")
-            if not call_data.get("toPhoneNumbers") or not isinstance(call_data.get("toPhoneNumbers"), list):
-                raise ValueError("To phone numbers list is required")
-            if not call_data.get("scheduledDateTime"):
-                raise ValueError("Scheduled date/time is required")
-            
-            # For AI calls, prompt is required
-            if call_data.get("callType") == "ai" and not call_data.get("promptId"):
-                raise ValueError("Prompt ID is required for AI calls")
+            # Required fields are validated by the collection's $jsonSchema (see ensure_indexes),
+            # or checked here if the validator could not be attached
+            if not MongoDBScheduledCallStore._validator_attached:
+                error = _validation_error(call_data)
+                if error:
+                    logger.error(f"❌ Scheduled call failed validation: {error}")
+                    return None
             
             # Add timestamps, metadata, and user ID
-            call_data["created_at"] = datetime.utcnow().isoformat()
-            call_data["updated_at"] = datetime.utcnow().isoformat()
+            now = datetime.utcnow().isoformat()
+            call_data["created_at"] = now
+            call_data["updated_at"] = now
             call_data["status"] = call_data.get("status", "scheduled")
             call_data["isDeleted"] = False
             call_data["userId"] = user_id  # Store user ID for multi-tenancy
@@ -77,13 +219,16 @@ class MongoDBScheduledCallStore:
             # Insert scheduled call
             result = await collection.insert_one(call_data)
             
-            logger.info(f"✅ Successfully created scheduled call in MongoDB")
-            logger.info(f"   Call ID: {result.inserted_id}")
-            logger.info(f"   Type: {call_data.get('callType')}")
-            logger.info(f"   To: {len(call_data.get('toPhoneNumbers', []))} number(s)")
-            logger.info(f"   Scheduled: {call_data.get('scheduledDateTime')}")
+            logger.info(
+                f"✅ Created scheduled call {result.inserted_id} in MongoDB "
+                f"(type: {call_data.get('callType')}, to: {len(call_data.get('toPhoneNumbers', []))} number(s), "
+                f"scheduled: {call_data.get('scheduledDateTime')})"
+            )
             return str(result.inserted_id)
             
+        except WriteError as e:
+            logger.error(f"❌ Scheduled call failed validation (callType, fromPhoneNumberId, toPhoneNumbers, scheduledDateTime and an AI prompt are required): {e}")
+            return None
         except Exception as e:
             logger.error(f"❌ Error creating scheduled call: {e}", exc_info=True)
             return None
@@ -99,20 +244,21 @@ class MongoDBScheduledCallStore:
             if collection is None:
                 return None
             
-            from bson import ObjectId
+            object_id = _to_object_id(call_id)
+            if object_id is None:
+                logger.debug(f"Invalid scheduled call ID: {call_id}")
+                return None
+            
             query = {
-                "_id": ObjectId(call_id),
-                "isDeleted": {"$ne": True}
+                "_id": object_id,
+                "isDeleted": False
             }
             if user_id:
                 query["userId"] = user_id
             call = await collection.find_one(query)
             
             if call:
-                call_dict = dict(call)
-                call_dict["id"] = str(call_dict["_id"])
-                del call_dict["_id"]
-                return call_dict
+                return _call_from_doc(call)
             return None
             
         except Exception as e:
@@ -135,7 +281,7 @@ class MongoDBScheduledCallStore:
             user_id: Optional user ID for multi-tenancy filtering
         
         Returns:
-            List of scheduled call dictionaries
+            List of scheduled call dictionaries (without promptContent)
         """
         if not is_mongodb_available():
             logger.debug("MongoDB not available, skipping scheduled calls list")
@@ -148,7 +294,7 @@ class MongoDBScheduledCallStore:
                 return []
             
             # Build query - always exclude deleted calls
-            query = {"isDeleted": {"$ne": True}}
+            query = {"isDeleted": False}
             if phone_number_id:
                 query["fromPhoneNumberId"] = phone_number_id
             if status:
@@ -158,14 +304,10 @@ class MongoDBScheduledCallStore:
             if user_id:
                 query["userId"] = user_id
             
-            logger.debug(f"Querying scheduled calls with query: {query}")
-            
-            calls = []
-            async for doc in collection.find(query).sort("scheduledDateTime", 1):
-                call_dict = dict(doc)
-                call_dict["id"] = str(call_dict["_id"])
-                del call_dict["_id"]
-                calls.append(call_dict)
+            # The whole list is returned anyway - let the driver drain the cursor
+            cursor = collection.find(query, projection=_LIST_PROJECTION).sort("scheduledDateTime", 1).batch_size(_CURSOR_BATCH_SIZE)
+            docs = await cursor.to_list(length=None)
+            calls = [_call_from_doc(doc) for doc in docs]
             
             logger.info(f"📞 Found {len(calls)} scheduled call(s) in collection '{self.collection_name}'")
             
@@ -186,11 +328,15 @@ class MongoDBScheduledCallStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
+            object_id = _to_object_id(call_id)
+            if object_id is None:
+                logger.warning(f"Invalid scheduled call ID: {call_id}")
+                return False
+            
             update_data["updated_at"] = datetime.utcnow().isoformat()
             
             result = await collection.update_one(
-                {"_id": ObjectId(call_id)},
+                {"_id": object_id},
                 {"$set": update_data}
             )
             
@@ -221,10 +367,13 @@ class MongoDBScheduledCallStore:
             if collection is None:
                 return False
             
-            from bson import ObjectId
+            object_id = _to_object_id(call_id)
+            if object_id is None:
+                logger.warning(f"Invalid scheduled call ID: {call_id}")
+                return False
             
             # Soft delete: set isDeleted to True
-            delete_query = {"_id": ObjectId(call_id)}
+            delete_query = {"_id": object_id}
             if user_id:
                 delete_query["userId"] = user_id
             result = await collection.update_one(
@@ -265,21 +414,16 @@ class MongoDBScheduledCallStore:
                 return []
             
             query = {
-                "isDeleted": {"$ne": True},
+                "isDeleted": False,
                 "status": "scheduled"  # Changed from 'pending' to 'scheduled'
             }
             
             if before_datetime:
                 query["scheduledDateTime"] = {"$lte": before_datetime}
             
-            calls = []
-            async for doc in collection.find(query).sort("scheduledDateTime", 1):
-                call_dict = dict(doc)
-                call_dict["id"] = str(call_dict["_id"])
-                del call_dict["_id"]
-                calls.append(call_dict)
-            
-            return calls
+            cursor = collection.find(query).sort("scheduledDateTime", 1).batch_size(_CURSOR_BATCH_SIZE)
+            docs = await cursor.to_list(length=None)
+            return [_call_from_doc(doc) for doc in docs]
             
         except Exception as e:
             logger.error(f"Error getting pending calls: {e}", exc_info=True)
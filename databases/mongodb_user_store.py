@@ -6,15 +6,30 @@ Handles user registration, login, and user management
 from typing import Optional, Dict, Any
 from datetime import datetime
 import uuid
+import asyncio
 import logging
 import bcrypt
+from pymongo.errors import DuplicateKeyError
 from databases.mongodb_db import get_mongo_db, is_mongodb_available
 
 logger = logging.getLogger(__name__)
 
+# Lookups return the user without the password hash; only verify_password reads it
+_PUBLIC_USER_PROJECTION = {"_id": 0, "password_hash": 0}
+
+# Only what verify_password checks and returns
+_LOGIN_PROJECTION = {"_id": 0, "password_hash": 1, "user_id": 1, "email": 1, "isActive": 1, "created_at": 1}
+
 class MongoDBUserStore:
     """MongoDB store for user authentication and management"""
     
+    # Indexes only need to be created once per process
+    _indexes_ensured = False
+    # Resolved collection, shared across instances (handlers create a store per
+    # request); re-resolved if MongoDB is re-initialized with a new database
+    _collection = None
+    _collection_db = None
+    
     def __init__(self):
         self.collection_name = "users"
     
@@ -23,7 +38,33 @@ class MongoDBUserStore:
         db = get_mongo_db()
         if db is None:
             raise Exception("MongoDB is not available")
-        return db[self.collection_name]
+        if MongoDBUserStore._collection_db is not db:
+            MongoDBUserStore._collection = db[self.collection_name]
+            MongoDBUserStore._collection_db = db
+        return MongoDBUserStore._collection
+    
+    async def ensure_indexes(self) -> bool:
+        """Create the unique indexes used by login and token lookups (idempotent)"""
+        if MongoDBUserStore._indexes_ensured:
+            return True
+        if not is_mongodb_available():
+            return False
+        
+        try:
+            collection = self._get_collection()
+            if collection is None:
+                return False
+            
+            # get_user_by_email (login/registration) and get_user_by_id (every authenticated request)
+            await collection.create_index([("email", 1)], name="uniq_email", unique=True, background=True)
+            await collection.create_index([("user_id", 1)], name="uniq_user_id", unique=True, background=True)
+            MongoDBUserStore._indexes_ensured = True
+            logger.info(f"✅ Indexes ensured on '{self.collection_name}' collection")
+            return True
+            
+        except Exception as e:
+            logger.warning(f"Could not ensure indexes on '{self.collection_name}': {e}")
+            return False
     
     async def create_user(self, email: str, password: str) -> Dict[str, Any]:
         """
@@ -44,31 +85,36 @@ class MongoDBUserStore:
         
         # Normalize email
         email = email.lower().strip()
+        collection = self._get_collection()
         
-        # Check if user already exists
-        existing_user = await self.get_user_by_email(email)
-        if existing_user:
-            raise Exception("User with this email already exists")
+        # uniq_email is the duplicate guard. Until it exists (e.g. it could not be built
+        # over existing duplicate emails), check for the email before inserting.
+        if not MongoDBUserStore._indexes_ensured:
+            if await collection.find_one({"email": email}, projection={"_id": 1}):
+                raise Exception("User with this email already exists")
         
-        # Hash password
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        # Hash password - bcrypt is deliberately slow, so keep it off the event loop
+        password_hash = await asyncio.to_thread(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
         
         # Generate UUID for user
         user_id = str(uuid.uuid4())
         
         # Create user document
+        now = datetime.utcnow().isoformat()
         user_doc = {
             "user_id": user_id,
             "email": email,
             "password_hash": password_hash.decode('utf-8'),
             "isActive": True,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat(),
+            "created_at": now,
+            "updated_at": now,
         }
         
-        # Insert into MongoDB
-        collection = self._get_collection()
-        await collection.insert_one(user_doc)
+        # Insert into MongoDB - the unique email index rejects existing emails
+        try:
+            await collection.insert_one(user_doc)
+        except DuplicateKeyError:
+            raise Exception("User with this email already exists")
         
         logger.info(f"Created new user: {email} with user_id: {user_id}")
         
@@ -88,20 +134,23 @@ class MongoDBUserStore:
             email: User's email address
             
         Returns:
-            User document or None if not found
+            User document (without password_hash) or None if not found
         """
         if not is_mongodb_available():
             return None
         
         email = email.lower().strip()
         collection = self._get_collection()
-        user = await collection.find_one({"email": email})
-        
-        if user:
-            # Remove MongoDB _id field
-            user.pop('_id', None)
+        return await collection.find_one({"email": email}, projection=_PUBLIC_USER_PROJECTION)
+    
+    async def _get_user_with_hash(self, email: str) -> Optional[Dict[str, Any]]:
+        """Get the login fields (including password_hash) by email - for verify_password only"""
+        if not is_mongodb_available():
+            return None
         
-        return user
+        email = email.lower().strip()
+        collection = self._get_collection()
+        return await collection.find_one({"email": email}, projection=_LOGIN_PROJECTION)
     
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -111,19 +160,13 @@ class MongoDBUserStore:
             user_id: User's UUID
             
         Returns:
-            User document or None if not found
+            User document (without password_hash) or None if not found
         """
         if not is_mongodb_available():
             return None
         
         collection = self._get_collection()
-        user = await collection.find_one({"user_id": user_id})
-        
-        if user:
-            # Remove MongoDB _id field
-            user.pop('_id', None)
-        
-        return user
+        return await collection.find_one({"user_id": user_id}, projection=_PUBLIC_USER_PROJECTION)
     
     async def verify_password(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """
@@ -136,7 +179,7 @@ class MongoDBUserStore:
         Returns:
             User document (without password_hash) if password is valid, None otherwise
         """
-        user = await self.get_user_by_email(email)
+        user = await self._get_user_with_hash(email)
         
         if not user:
             logger.warning(f"Login attempt for non-existent user: {email}")
@@ -144,7 +187,7 @@ class MongoDBUserStore:
         
         # Check if password matches
         password_hash = user.get("password_hash", "")
-        if bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
+        if await asyncio.to_thread(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')):
             logger.info(f"Successful login for user: {email}")
             # Return user without password_hash
             return {
@@ -200,8 +243,8 @@ class MongoDBUserStore:
         if not is_mongodb_available():
             return False
         
-        # Hash new password
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+        # Hash new password (in a worker thread, like create_user)
+        password_hash = await asyncio.to_thread(bcrypt.hashpw, new_password.encode('utf-8'), bcrypt.gensalt())
         
         collection = self._get_collection()
         result = await collection.update_one(
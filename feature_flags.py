@@ -12,11 +12,15 @@ Always enabled (no flag needed):
 """
 
 import os
+from functools import lru_cache
+from types import MappingProxyType
 
 
+@lru_cache(maxsize=1)
 def get_feature_flags():
-    """Get all feature flags from environment variables"""
-    return {
+    """Get all feature flags from environment variables.
+    Read once per process (read-only mapping); call get_feature_flags.cache_clear() to reload."""
+    return MappingProxyType({
         # Main features
         "voice": os.getenv("FEATURE_VOICE", "enabled"),
         "ai_chat": os.getenv("FEATURE_AI_CHAT", "enabled"),
@@ -28,7 +32,7 @@ def get_feature_flags():
         "campaign_voice": os.getenv("FEATURE_CAMPAIGN_VOICE", "enabled"),
         "campaign_sms": os.getenv("FEATURE_CAMPAIGN_SMS", "enabled"),
         "campaign_whatsapp": os.getenv("FEATURE_CAMPAIGN_WHATSAPP", "enabled"),
-    }
+    })
 
 
 # Mapping: which sidebar tabs belong to which feature group
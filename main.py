@@ -4,6 +4,7 @@ This is the main entry point for the voice agent system.
 It imports and runs the API from api_general.py
 """
 
+import re
 import uvicorn
 import logging
 from api_general import app
@@ -13,14 +14,13 @@ from config import API_HOST, API_PORT, DEBUG, RELOAD
 class PollingLogFilter(logging.Filter):
     """Filter out repetitive polling endpoint logs to reduce noise."""
     SUPPRESSED_PATHS = ["/api/calls", "/health", "/analytics/"]
+    # One pass over the message instead of a substring scan per path
+    _SUPPRESSED_PATTERN = re.compile("GET (?:" + "|".join(map(re.escape, SUPPRESSED_PATHS)) + ")")
     
     def filter(self, record: logging.LogRecord) -> bool:
         message = record.getMessage()
-        # Suppress GET requests to polling endpoints
-        for path in self.SUPPRESSED_PATHS:
-            if f'GET {path}' in message and '200' in message:
-                return False
-        return True
+        # Suppress successful GET requests to polling endpoints
+        return not ('200' in message and self._SUPPRESSED_PATTERN.search(message))
 
 if __name__ == "__main__":
     # Add filter to uvicorn access logger
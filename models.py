@@ -8,14 +8,15 @@ This module contains both SQLAlchemy database models and Pydantic API schemas.
 # ============================================================================
 
 # SQLAlchemy imports for database models
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import uuid
 
 # Pydantic imports for API schemas
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, computed_field
 from typing import Optional, Dict, Any, List
 
 # ============================================================================
@@ -28,12 +29,13 @@ class Customer(Base):
     """Customer database model"""
     __tablename__ = "customers"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Native 16-byte UUID keys (DATABASE_URL is PostgreSQL) instead of 36-char strings
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     phone_number = Column(String, unique=True, nullable=False)
     name = Column(String)
     email = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     # orders = relationship("Order", back_populates="customer")  # Commented out - Order model not defined
@@ -41,13 +43,18 @@ class Customer(Base):
 class ConversationSession(Base):
     """Conversation session database model"""
     __tablename__ = "conversation_sessions"
+    # Session resume looks up WHERE customer_id = ? AND status = 'active';
+    # customer_id leads, so this also serves plain customer_id lookups.
+    __table_args__ = (
+        Index("ix_conv_sessions_customer_id_status", "customer_id", "status"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    customer_id = Column(String, ForeignKey("customers.id"))
-    session_data = Column(Text)  # JSON string storing conversation state
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    customer_id = Column(UUID(as_uuid=True), ForeignKey("customers.id"))
+    session_data = Column(JSONB, default=dict)  # Conversation state, stored as binary JSON
     status = Column(String, default="active")  # active, completed, abandoned
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     customer = relationship("Customer")
@@ -59,17 +66,31 @@ class ConversationSession(Base):
 # General API Models
 class HealthResponse(BaseModel):
     """Health check response model"""
-    status: str = Field(..., description="Health status", example="healthy")
-    timestamp: str = Field(..., description="Current timestamp", example="2024-01-01T00:00:00Z")
-    version: str = Field(..., description="API version", example="1.0.0")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "status": "healthy",
+        "timestamp": "2024-01-01T00:00:00Z",
+        "version": "1.0.0"
+    }})
+    
+    status: str = Field(..., description="Health status")
+    timestamp: str = Field(..., description="Current timestamp")
+    version: str = Field(..., description="API version")
 
 class RootResponse(BaseModel):
     """Root endpoint response model"""
-    message: str = Field(..., description="API message", example="Voice Agent API")
-    version: str = Field(..., description="API version", example="1.0.0")
-    status: str = Field(..., description="API status", example="running")
-    documentation: str = Field(..., description="Documentation URL", example="/docs")
-    health_check: str = Field(..., description="Health check URL", example="/health")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "message": "Voice Agent API",
+        "version": "1.0.0",
+        "status": "running",
+        "documentation": "/docs",
+        "health_check": "/health"
+    }})
+    
+    message: str = Field(..., description="API message")
+    version: str = Field(..., description="API version")
+    status: str = Field(..., description="API status")
+    documentation: str = Field(..., description="Documentation URL")
+    health_check: str = Field(..., description="Health check URL")
 
 # Voice Processing Models
 class VoiceInputRequest(BaseModel):
@@ -81,48 +102,71 @@ class VoiceInputRequest(BaseModel):
 class VoiceInputResponse(BaseModel):
     """Voice input response model"""
     success: bool = Field(..., description="Whether the operation was successful")
-    text: Optional[str] = Field(None, description="Transcribed text from audio")
-    transcription: Optional[str] = Field(
+    text: Optional[str] = Field(
         None,
-        description="Alias for transcription text (legacy clients expect this key)"
-    )
-    transcript: Optional[str] = Field(
-        None,
-        description="Another alias for transcription text"
+        description="Transcribed text from audio",
+        validation_alias=AliasChoices("text", "transcription", "transcript")
     )
     error: Optional[str] = Field(None, description="Error message if operation failed")
+    
+    # Legacy keys are serialized from the one stored value instead of extra fields
+    @computed_field(description="Alias for transcription text (legacy clients expect this key)")
+    @property
+    def transcription(self) -> Optional[str]:
+        return self.text
+    
+    @computed_field(description="Another alias for transcription text")
+    @property
+    def transcript(self) -> Optional[str]:
+        return self.text
 
 class VoiceOutputRequest(BaseModel):
     """Voice output request model"""
-    text: str = Field(..., description="Text to convert to speech", example="Hello, how can I help you?")
-    voice: Optional[str] = Field(None, description="Voice to use; overrides persona voice if provided", example="alloy")
-    persona: Optional[str] = Field(None, description="Persona identifier influencing voice and style", example="friendly_guide")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "text": "Hello, how can I help you?",
+        "voice": "alloy",
+        "persona": "friendly_guide"
+    }})
+    
+    text: str = Field(..., description="Text to convert to speech")
+    voice: Optional[str] = Field(None, description="Voice to use; overrides persona voice if provided")
+    persona: Optional[str] = Field(None, description="Persona identifier influencing voice and style")
     audio_format: Optional[str] = Field(None, description="Desired audio container (e.g., mp3)")
 
 class VoiceOutputResponse(BaseModel):
     """Voice output response model"""
     success: bool = Field(..., description="Whether the operation was successful")
-    audio_base64: Optional[str] = Field(None, description="Base64 encoded audio data")
-    audioContent: Optional[str] = Field(
+    audio_base64: Optional[str] = Field(
         None,
-        description="CamelCase alias for base64 audio content (legacy clients)"
+        description="Base64 encoded audio data",
+        validation_alias=AliasChoices("audio_base64", "audioContent")
     )
     text: Optional[str] = Field(None, description="Original text")
     error: Optional[str] = Field(None, description="Error message if operation failed")
     persona: Optional[str] = Field(None, description="Persona used for synthesis")
     voice: Optional[str] = Field(None, description="Voice identifier used for synthesis")
-    metadata: Optional[Dict[str, Any]] = Field(
+    metadata: Any = Field(
         default=None,
         description="Additional metadata like model, voice, duration, and byte length"
     )
+    
+    @computed_field(description="CamelCase alias for base64 audio content (legacy clients)")
+    @property
+    def audioContent(self) -> Optional[str]:
+        return self.audio_base64
 
 # Conversation Models
 class ConversationRequest(BaseModel):
     """Conversation request model"""
     # Enable both attribute and alias-based population
-    model_config = {"populate_by_name": True}
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={"example": {
+            "text": "Hello, how can you help me?"
+        }},
+    )
     
-    text: Optional[str] = Field(None, description="User input text", example="Hello, how can you help me?")
+    text: Optional[str] = Field(None, description="User input text")
     input_text: Optional[str] = Field(None, description="Legacy alias for user text")
     user_input: Optional[str] = Field(None, description="Alternate user text field")
     session_id: Optional[str] = Field(None, description="Conversation session ID")
@@ -140,15 +184,17 @@ class ConversationRequest(BaseModel):
 
 class ConversationResponse(BaseModel):
     """Conversation response model"""
+    # Free-form payloads built by the server are typed Any so pydantic passes them
+    # through instead of re-checking every nested dict on validation and serialization
     response: str = Field(..., description="Agent response text")
-    session_data: Dict[str, Any] = Field(..., description="Updated session data")
+    session_data: Any = Field(..., description="Updated session data")
     session_id: Optional[str] = Field(None, description="Echo of the session identifier for convenience")
     next_state: Optional[str] = Field(None, description="Next conversation state")
-    actions: List[str] = Field(default=[], description="Actions to take")
-    persona: Optional[Dict[str, Any]] = Field(None, description="Persona metadata that generated this response")
+    actions: List[str] = Field(default_factory=list, description="Actions to take")
+    persona: Any = Field(None, description="Persona metadata that generated this response")
     response_text: Optional[str] = Field(None, description="Alias for response text")
-    history: List[Dict[str, Any]] = Field(default_factory=list, description="Simplified conversation history")
-    voice_profile: Optional[Dict[str, Any]] = Field(None, description="Persona voice profile metadata")
+    history: list = Field(default_factory=list, description="Simplified conversation history")
+    voice_profile: Any = Field(None, description="Persona voice profile metadata")
 
 class ConversationStartRequest(BaseModel):
     """Conversation start request model"""
@@ -159,9 +205,9 @@ class ConversationStartResponse(BaseModel):
     """Conversation start response model"""
     session_id: str = Field(..., description="New session ID")
     conversation_id: Optional[str] = Field(None, description="Alias for session_id (legacy clients)")
-    session_data: Dict[str, Any] = Field(..., description="Initial session data")
+    session_data: Any = Field(..., description="Initial session data")
     message: str = Field(..., description="Success message")
-    persona: Optional[Dict[str, Any]] = Field(None, description="Persona metadata associated with the session")
+    persona: Any = Field(None, description="Persona metadata associated with the session")
     created_at: Optional[str] = Field(None, description="Timestamp when the session was created")
 
 # Voice Agent Pipeline Models
@@ -171,9 +217,9 @@ class VoiceAgentProcessResponse(BaseModel):
     user_input: Optional[str] = Field(None, description="Transcribed user input")
     agent_response: Optional[str] = Field(None, description="Agent response text")
     audio_response: Optional[str] = Field(None, description="Base64 encoded audio response")
-    session_data: Optional[Dict[str, Any]] = Field(None, description="Updated session data")
+    session_data: Any = Field(None, description="Updated session data")
     next_state: Optional[str] = Field(None, description="Next conversation state")
-    actions: List[str] = Field(default=[], description="Actions to take")
+    actions: List[str] = Field(default_factory=list, description="Actions to take")
     persona: Optional[str] = Field(None, description="Persona used for this turn")
     voice: Optional[str] = Field(None, description="Voice identifier used for speech synthesis")
     error: Optional[str] = Field(None, description="Error message when success is False")
@@ -208,12 +254,22 @@ class PaginationResponse(BaseModel):
 # Authentication Models
 class UserRegistrationRequest(BaseModel):
     """User registration request model"""
-    email: str = Field(..., description="User email address", example="user@example.com")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "email": "user@example.com",
+        "password": "secret123"
+    }})
+    
+    email: str = Field(..., description="User email address")
     password: str = Field(..., description="User password (min 6 characters)", min_length=6)
 
 class UserLoginRequest(BaseModel):
     """User login request model"""
-    email: str = Field(..., description="User email address", example="user@example.com")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "email": "user@example.com",
+        "password": "secret123"
+    }})
+    
+    email: str = Field(..., description="User email address")
     password: str = Field(..., description="User password")
 
 class UserLoginResponse(BaseModel):
@@ -234,8 +290,14 @@ class UserInfoResponse(BaseModel):
 
 class PersonaSummary(BaseModel):
     """Lightweight persona metadata"""
-    id: str = Field(..., description="Persona identifier", example="friendly_guide")
-    name: str = Field(..., description="Display name", example="Friendly Guide")
+    model_config = ConfigDict(json_schema_extra={"example": {
+        "id": "friendly_guide",
+        "name": "Friendly Guide",
+        "description": "Warm, upbeat helper who keeps conversations light and encouraging."
+    }})
+    
+    id: str = Field(..., description="Persona identifier")
+    name: str = Field(..., description="Display name")
     description: str = Field(..., description="Persona description")
     tts_voice: Optional[str] = Field(None, description="Voice associated with persona")
     tts_model: Optional[str] = Field(None, description="Preferred TTS model")
@@ -246,7 +308,7 @@ class PersonaSummary(BaseModel):
 # ============================================================================
 
 # Database models
-__all__ = [
+__all__ = (
     # Database models
     "Base", "Customer", "ConversationSession",
     
@@ -263,6 +325,6 @@ __all__ = [
     
     # Authentication models
     "UserRegistrationRequest", "UserLoginRequest",
-    "UserLoginResponse", "UserInfoResponse"
-]
+    "UserLoginResponse", "UserInfoResponse",
+)
 
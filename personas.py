@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 
-_PERSONAS: Dict[str, Dict[str, Any]] = {
+_PERSONA_DEFINITIONS: Dict[str, Dict[str, Any]] = {
     "friendly_guide": {
         "id": "friendly_guide",
         "display_name": "Friendly Guide",
@@ -70,26 +71,48 @@ _PERSONAS: Dict[str, Dict[str, Any]] = {
     },
 }
 
+# Persona configs are shared, read-only views built once at import time so
+# lookups never copy and callers cannot mutate the catalog.
+_PERSONAS: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+    {key: MappingProxyType(cfg) for key, cfg in _PERSONA_DEFINITIONS.items()}
+)
+
 _DEFAULT_PERSONA_KEY = "friendly_guide"
 
 
-def get_persona_config(persona_name: Optional[str]) -> Dict[str, Any]:
+def _build_persona_index() -> Dict[str, Mapping[str, Any]]:
+    """Map every known spelling of a persona (id and display name) to its config."""
+
+    index: Dict[str, Mapping[str, Any]] = {}
+    for key, cfg in _PERSONAS.items():
+        for name in (key, cfg["display_name"]):
+            index[name] = cfg
+            index[name.lower()] = cfg
+    return index
+
+
+_PERSONA_INDEX = _build_persona_index()
+_DEFAULT_PERSONA = _PERSONAS[_DEFAULT_PERSONA_KEY]
+
+
+def get_persona_config(persona_name: Optional[str]) -> Mapping[str, Any]:
     """Return persona configuration for the given name (fallback to default)."""
 
-    if persona_name:
-        # Ensure persona_name is a string before calling string methods
-        persona_str = str(persona_name) if not isinstance(persona_name, str) else persona_name
-        key = persona_str.lower().strip()
-        if key in _PERSONAS:
-            return _PERSONAS[key]
+    if not persona_name:
+        return _DEFAULT_PERSONA
 
-    return _PERSONAS[_DEFAULT_PERSONA_KEY]
+    # Fast path: known ids and display names resolve with a single dict lookup
+    cfg = _PERSONA_INDEX.get(persona_name) if isinstance(persona_name, str) else None
+    if cfg is not None:
+        return cfg
 
+    # Ensure persona_name is a string before calling string methods
+    persona_str = str(persona_name) if not isinstance(persona_name, str) else persona_name
+    return _PERSONA_INDEX.get(persona_str.lower().strip(), _DEFAULT_PERSONA)
 
-def list_personas() -> List[Dict[str, Any]]:
-    """Return lightweight persona summaries suitable for API responses."""
 
-    return [
+_PERSONA_SUMMARIES: Tuple[Mapping[str, Any], ...] = tuple(
+    MappingProxyType(
         {
             "id": cfg["id"],
             "name": cfg["display_name"],
@@ -98,7 +121,12 @@ def list_personas() -> List[Dict[str, Any]]:
             "tts_model": cfg.get("tts_model"),
             "realtime_voice": cfg.get("realtime_voice"),
         }
-        for cfg in _PERSONAS.values()
-    ]
+    )
+    for cfg in _PERSONAS.values()
+)
 
 
+def list_personas() -> Tuple[Mapping[str, Any], ...]:
+    """Return lightweight persona summaries suitable for API responses."""
+
+    return _PERSONA_SUMMARIES
@@ -0,0 +1,88 @@
+"""
+Migration Script: Split embedded conversation messages into per-message documents
+
+Messages used to be stored as an ever-growing `messages` array inside one
+'messages' document per agent_id + user_number. They are now stored one
+document per message in the 'conversation_messages' collection.
+
+The API runs this copy automatically at startup (and refuses to start if it
+fails); this script runs the same copy by hand, e.g. ahead of a deploy.
+Timestamps are converted to BSON Dates, missing roles/directions are
+derived from each other and every message is given a conversation_id.
+Safe to run multiple times - every copied message gets a deterministic _id
+(legacy document + array position), so messages already copied are skipped
+whether or not they have a message_sid.
+
+Every legacy timestamp is parsed, so installing the optional `ciso8601`
+package (pip install ciso8601) speeds up large migrations noticeably.
+
+Usage:
+    python scripts/migrate_messages_collection.py
+"""
+
+import asyncio
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+from databases.mongodb_db import initialize_mongodb, get_mongo_db, test_connection
+from databases.mongodb_message_store import MongoDBMessageStore
+
+
+async def migrate():
+    """Copy embedded messages from 'messages' into 'conversation_messages'"""
+    
+    # Initialize MongoDB connection
+    print("🔌 Initializing MongoDB connection...")
+    init_result = initialize_mongodb()
+    if not init_result:
+        print("❌ Failed to initialize MongoDB. Check MONGODB_URL in .env")
+        return False
+    
+    # Test the connection
+    test_result = await test_connection()
+    if not test_result:
+        print("❌ MongoDB connection test failed.")
+        return False
+    
+    print("✅ MongoDB connected successfully!")
+    
+    if get_mongo_db() is None:
+        print("❌ Could not get MongoDB database instance.")
+        return False
+    
+    message_store = MongoDBMessageStore()
+    if not await message_store.has_unmigrated_legacy_messages():
+        print("ℹ️ No legacy messages left to copy. No migration needed.")
+        return True
+    
+    if not await message_store.migrate_legacy_messages():
+        print("❌ Error migrating messages. See the log above.")
+        return False
+    
+    print("ℹ️ The 'messages' collection was left in place (annotated with migrated_message_count); "
+          "drop it once the migration is verified.")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("Conversation Messages Migration Script")
+    print("=" * 50)
+    print()
+    
+    result = asyncio.run(migrate())
+    
+    print()
+    if result:
+        print("✅ Migration completed successfully!")
+    else:
+        print("❌ Migration failed. See errors above.")
+    
+    sys.exit(0 if result else 1)
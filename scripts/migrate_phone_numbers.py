@@ -0,0 +1,102 @@
+"""
+Migration Script: Normalize stored phone numbers in 'registered_phone_numbers'
+
+Phone registrations and lookups match on the normalized E.164 `phoneNumber`
+only. Older registrations may still hold a number in its original format;
+this script rewrites them to the normalized form, drops the unused
+`originalPhoneNumber` field and then creates the phone store indexes.
+
+The API runs the same normalization at startup; this script also removes
+`originalPhoneNumber` and can be run by hand, e.g. ahead of a deploy.
+Safe to run multiple times - already-normalized documents are left alone.
+
+Usage:
+    python scripts/migrate_phone_numbers.py
+"""
+
+import asyncio
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Load environment variables
+from dotenv import load_dotenv
+load_dotenv()
+
+from databases.mongodb_db import initialize_mongodb, get_mongo_db, is_mongodb_available, test_connection
+from databases.mongodb_phone_store import MongoDBPhoneStore
+
+
+async def migrate():
+    """Rewrite un-normalized phoneNumber values and ensure indexes"""
+    
+    # Initialize MongoDB connection
+    print("🔌 Initializing MongoDB connection...")
+    init_result = initialize_mongodb()
+    if not init_result:
+        print("❌ Failed to initialize MongoDB. Check MONGODB_URL in .env")
+        return False
+    
+    # Test the connection
+    test_result = await test_connection()
+    if not test_result:
+        print("❌ MongoDB connection test failed.")
+        return False
+    
+    print("✅ MongoDB connected successfully!")
+    
+    db = get_mongo_db()
+    if db is None:
+        print("❌ Could not get MongoDB database instance.")
+        return False
+    
+    phone_store = MongoDBPhoneStore()
+    collection = db[phone_store.collection_name]
+    
+    total = await collection.count_documents({})
+    print(f"📊 Found {total} document(s) in '{phone_store.collection_name}'.")
+    
+    # Same rewrite the API runs at startup
+    if not await phone_store.normalize_stored_numbers():
+        print("❌ Error normalizing phone numbers. See the log above.")
+        return False
+    print("✅ Phone numbers normalized.")
+    
+    try:
+        # The raw input number was stored for reference but never read
+        result = await collection.update_many(
+            {"originalPhoneNumber": {"$exists": True}},
+            {"$unset": {"originalPhoneNumber": ""}}
+        )
+        print(f"✅ Removed originalPhoneNumber from {result.modified_count} document(s).")
+        
+    except Exception as e:
+        print(f"❌ Error removing originalPhoneNumber: {e}")
+        return False
+    
+    # The unique index fails to build if two live registrations now share a number
+    if not await phone_store.ensure_indexes():
+        print("❌ Could not create indexes - check for duplicate live registrations (same userId, type and phoneNumber).")
+        return False
+    
+    print("✅ Indexes ensured.")
+    return True
+
+
+if __name__ == "__main__":
+    print("=" * 50)
+    print("Phone Number Normalization Script")
+    print("=" * 50)
+    print()
+    
+    result = asyncio.run(migrate())
+    
+    print()
+    if result:
+        print("✅ Migration completed successfully!")
+    else:
+        print("❌ Migration failed. See errors above.")
+    
+    sys.exit(0 if result else 1)
@@ -0,0 +1,130 @@
+"""
+Unit tests for the message write batcher in databases.mongodb_message_store
+Uses an in-memory fake collection, so no MongoDB server is needed
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from databases.mongodb_message_store import _MessageWriteBatcher
+
+
+class FakeCollection:
+    """Records bulk_write calls and fails the documents listed in write_errors"""
+
+    def __init__(self, write_errors=None, exception=None, delay=0.0):
+        self.write_errors = write_errors or {}
+        self.exception = exception
+        self.delay = delay
+        self.calls = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append([op._doc for op in operations])
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.exception is not None:
+            raise self.exception
+        errors = [
+            {"index": index, "code": code, "errmsg": f"error on {op._doc['n']}"}
+            for index, op in enumerate(operations)
+            for n, code in self.write_errors.items()
+            if op._doc["n"] == n
+        ]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+async def _submit_all(batcher, collection, numbers):
+    """Submit one insert per number concurrently, returning results or exceptions"""
+    return await asyncio.gather(
+        *(batcher.submit(collection, InsertOne({"n": n})) for n in numbers),
+        return_exceptions=True
+    )
+
+
+def test_concurrent_writes_share_one_bulk_write():
+    collection = FakeCollection()
+    batcher = _MessageWriteBatcher(batch_size=10, batch_ms=20)
+
+    results = asyncio.run(_submit_all(batcher, collection, range(5)))
+
+    assert results == [None] * 5
+    assert collection.calls == [[{"n": n} for n in range(5)]]
+
+
+def test_each_future_gets_its_own_error():
+    collection = FakeCollection(write_errors={1: 11000, 3: 121})
+    batcher = _MessageWriteBatcher(batch_size=10, batch_ms=20)
+
+    results = asyncio.run(_submit_all(batcher, collection, range(5)))
+
+    assert results[0] is None and results[2] is None and results[4] is None
+    assert isinstance(results[1], DuplicateKeyError)
+    assert results[1].code == 11000
+    assert isinstance(results[3], OperationFailure)
+    assert not isinstance(results[3], DuplicateKeyError)
+    assert results[3].code == 121
+
+
+def test_unexpected_error_fans_out_to_every_caller():
+    failure = RuntimeError("connection reset")
+    collection = FakeCollection(exception=failure)
+    batcher = _MessageWriteBatcher(batch_size=10, batch_ms=20)
+
+    results = asyncio.run(_submit_all(batcher, collection, range(3)))
+
+    assert results == [failure] * 3
+
+
+def test_batch_size_one_writes_immediately():
+    collection = FakeCollection(write_errors={0: 11000})
+    batcher = _MessageWriteBatcher(batch_size=1, batch_ms=1000)
+
+    async def run():
+        await batcher.submit(collection, InsertOne({"n": 1}))
+        with pytest.raises(DuplicateKeyError):
+            await batcher.submit(collection, InsertOne({"n": 0}))
+
+    asyncio.run(run())
+    assert collection.calls == [[{"n": 1}], [{"n": 0}]]
+
+
+def test_writes_go_to_the_callers_collection():
+    first, second = FakeCollection(), FakeCollection()
+    batcher = _MessageWriteBatcher(batch_size=10, batch_ms=20)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit(first, InsertOne({"n": 1})),
+            batcher.submit(second, InsertOne({"n": 2})),
+            batcher.submit(first, InsertOne({"n": 3})),
+        )
+
+    assert asyncio.run(run()) == [None, None, None]
+    assert first.calls == [[{"n": 1}, {"n": 3}]]
+    assert second.calls == [[{"n": 2}]]
+
+
+def test_slow_flush_does_not_block_next_batch():
+    slow = FakeCollection(delay=0.5)
+    fast = FakeCollection()
+    batcher = _MessageWriteBatcher(batch_size=2, batch_ms=1)
+
+    async def run():
+        slow_write = asyncio.ensure_future(batcher.submit(slow, InsertOne({"n": 1})))
+        await asyncio.sleep(0.05)
+        # The slow batch is still in flight; this one must not wait behind it
+        await asyncio.wait_for(batcher.submit(fast, InsertOne({"n": 2})), timeout=0.2)
+        assert not slow_write.done()
+        await slow_write
+
+    asyncio.run(run())
+    assert fast.calls == [[{"n": 2}]]
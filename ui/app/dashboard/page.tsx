@@ -2661,7 +2661,8 @@ const ActivityLogsView = () => {
       try {
         const [callsRes, msgsRes] = await Promise.all([
           fetch('/api/calls'),
-          fetch('/api/messages')
+          // The activity feed only shows the latest message, so skip the message arrays
+          fetch('/api/messages?include_messages=false')
         ])
 
         let combined: any[] = []
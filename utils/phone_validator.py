@@ -5,6 +5,7 @@ Handles E.164 formatting, validation, and cleaning
 
 import re
 import logging
+from functools import lru_cache
 from typing import Tuple, Optional
 
 logger = logging.getLogger(__name__)
@@ -44,9 +45,12 @@ def clean_phone_number(phone: str) -> str:
     return cleaned
 
 
+@lru_cache(maxsize=8192)
 def normalize_to_e164(phone: str, default_country_code: str = '1') -> Tuple[str, bool, str]:
     """
     Normalize phone number to E.164 format
+    Results are memoized - process_phone_list normalizes each number twice
+    (directly and via validate_phone_number).
     
     Args:
         phone: Raw phone number string
@@ -142,12 +146,11 @@ def detect_duplicates(phone_list: list) -> dict:
         if not is_valid or not normalized:
             continue
         
-        if normalized in seen:
-            if normalized not in duplicates:
-                duplicates[normalized] = [seen[normalized]]
-            duplicates[normalized].append(idx)
-        else:
+        first_idx = seen.get(normalized)
+        if first_idx is None:
             seen[normalized] = idx
+        else:
+            duplicates.setdefault(normalized, [first_idx]).append(idx)
     
     return duplicates
 